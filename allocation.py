@@ -0,0 +1,82 @@
+'''
+Round start allocation search: which two of our six cards go on which board.
+'''
+import itertools
+import time
+import numpy as np
+import fast_eval
+from equity import deal_against_range
+from preflop import PARTITIONS
+from skeleton.states import SMALL_BLIND, BIG_BLIND, NUM_BOARDS
+
+BOARD_STAKES = np.array([SMALL_BLIND + BIG_BLIND] * NUM_BOARDS, dtype=np.float64) #chips in each board's pot before any betting
+ALLOCATION_CHUNK = 100 #run-outs per board between clock checks
+ALLOCATION_MAX_ITERS = 200 #past a few hundred run-outs the chosen allocation barely improves
+
+PAIRS = np.array(list(itertools.combinations(range(6), 2))) #(15, 2) every pair of our cards, as hand indices
+_PAIR_ID = {tuple(pair): i for i, pair in enumerate(PAIRS.tolist())}
+PARTITION_PAIRS = np.array([[_PAIR_ID[tuple(pair)] for pair in partition] for partition in PARTITIONS.tolist()]) #(15, 3)
+ORDERINGS = np.array(list(itertools.permutations(range(NUM_BOARDS)))) #(6, 3) board of each pair in a partition
+
+
+def pair_board_sums(card_ids, board_ranges, iters, rng):
+    '''
+    Plays 'iters' random hands per board and scores every pair of our cards on
+    all of them: the opponent's hand comes from that board's range and our
+    other four cards are dead. Every pair sees the same run-outs on a board,
+    so differences between pairs are measured with much less noise than
+    independent samples would give. Boards given the same range object are
+    only sampled once.
+    Arguments:
+    board_ranges: one 1326 opp_range weight vector per board
+    Returns:
+    a (15, NUM_BOARDS) array of score sums (1 win, .5 tie, 0 loss), rows in PAIRS order
+    '''
+    card_ids = np.asarray(card_ids, dtype=np.int32)
+    known = np.zeros(52, dtype=bool)
+    known[card_ids] = True
+    deck = np.flatnonzero(~known).astype(np.int32)
+    columns = {} #id of each distinct range -> its column in draws
+    board_columns = [columns.setdefault(id(opp_range), len(columns)) for opp_range in board_ranges]
+    distinct = {column: opp_range for opp_range, column in zip(board_ranges, board_columns)}
+    draws = np.stack([deal_against_range(deck, distinct[column], 5, iters, rng) for column in range(len(columns))]) #(ranges, iters, 7) opp hand, then the board
+    community = draws[:, :, 2:]
+    ours = np.concatenate([np.broadcast_to(card_ids[PAIRS][:, None, None, :], (len(PAIRS), len(columns), iters, 2)),
+                           np.broadcast_to(community, (len(PAIRS),) + community.shape)], axis=3) #(15, ranges, iters, 7)
+    values = fast_eval.evaluate(np.concatenate([draws.reshape(-1, 7), ours.reshape(-1, 7)])) #one evaluator call for everything
+    opp_values = values[:len(columns) * iters].reshape(len(columns), iters)
+    our_values = values[len(columns) * iters:].reshape(len(PAIRS), len(columns), iters)
+    sums = ((our_values > opp_values) + .5 * (our_values == opp_values)).sum(axis=2)
+    return sums[:, board_columns]
+
+
+def allocation_search(card_ids, board_ranges, rng, time_budget, stakes=BOARD_STAKES, min_iters=ALLOCATION_CHUNK, max_iters=ALLOCATION_MAX_ITERS):
+    '''
+    Scores all 15 partitions of our six cards times the 6 ways of putting the
+    three pairs on the boards by simulated showdown value, each board's pot
+    weighted by its stake, and keeps the best. Run-outs are added in chunks
+    until 'time_budget' seconds are spent (after the first 'min_iters').
+    Arguments:
+    card_ids: our six cards as integers
+    board_ranges: one 1326 opp_range weight vector per board
+    rng: a numpy Generator
+    Returns:
+    the card index pair for each board, and the number of hands simulated
+    '''
+    start = time.perf_counter()
+    sums = np.zeros((len(PAIRS), NUM_BOARDS))
+    iters = 0
+    chunk = min_iters
+    while iters < max_iters:
+        sums += pair_board_sums(card_ids, board_ranges, chunk, rng)
+        iters += chunk
+        if time.perf_counter() - start >= time_budget:
+            break
+        chunk = ALLOCATION_CHUNK
+    values = stakes * (2 * sums / iters - 1) #(15, 3) expected chips of each pair on each board
+    scores = values[PARTITION_PAIRS[:, None, :], ORDERINGS[None, :, :]].sum(axis=2) #(15, 6)
+    partition, ordering = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    assignment = [None] * NUM_BOARDS
+    for j, board in enumerate(ORDERINGS[ordering]):
+        assignment[board] = PARTITIONS[partition][j]
+    return assignment, iters * len({id(opp_range) for opp_range in board_ranges}) * (len(PAIRS) + 1)
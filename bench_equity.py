@@ -0,0 +1,169 @@
+'''
+Accuracy vs speed benchmark for the equity backends behind
+Player.calcualte_strength. A fixed, seeded corpus of (hole, board, dead)
+situations is dealt for every street, each gets a reference equity, and
+every backend is timed on the whole corpus and scored against the
+references, so a faster estimator can be shown not to cost accuracy.
+
+References are exact enumerations from the flop on. Enumerating a preflop
+situation is about a billion hand evaluations, so preflop references are
+REFERENCE_SAMPLES samples instead and their standard error is printed with
+the results (a backend's preflop error can't be measured below it).
+
+    python bench_equity.py --situations 25 --iters 100 1000 --budget .05
+'''
+import argparse
+import random
+import time
+import numpy as np
+import player
+from board_eval import BoardEvaluation
+from cards import int_to_card
+from equity import monte_carlo_strength, batch_strength, anytime_estimates, sample_sums, exact_strength, enumeration_size, enumerate_strength, sample_count
+from equity import EXACT_MAX_COMBOS
+from equity_cache import EQUITY_CACHE
+from scheduler import TimeBudget
+
+STREETS = (0, 3, 4, 5)
+CORPUS_SEED = 0
+REFERENCE_SAMPLES = 1000000 #preflop reference samples, a standard error of about .0005
+
+
+class FixedBudget(TimeBudget):
+    '''
+    A TimeBudget that gives every decision the same number of seconds, so
+    the Player backend is timed the same way whatever the game clock.
+    '''
+
+    def __init__(self, seconds):
+        super().__init__(1)
+        self.seconds = seconds
+
+    def decision_budget(self):
+        return self.seconds
+
+
+def build_corpus(size, seed=CORPUS_SEED):
+    '''
+    Deals 'size' situations per street from a seeded shuffle: our two hole
+    cards, our other four cards (dead) and the board, all as card ints.
+    Returns:
+    a list of (street, hole, board, dead) tuples
+    '''
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for street in STREETS:
+        for _ in range(size):
+            cards = rng.permutation(52)[:6 + street].tolist()
+            corpus.append((street, cards[:2], cards[6:], cards[2:6]))
+    return corpus
+
+
+def reference_equity(hole, board, dead, rng):
+    '''
+    Returns:
+    the reference equity of a situation and its standard error (0 when exact)
+    '''
+    if len(board) > 0:
+        return enumerate_strength(hole, board, dead), 0.
+    totals, squares, replicates = sample_sums([(hole, board, dead)], REFERENCE_SAMPLES, rng)
+    mean = totals[0] / replicates
+    return float(mean), float(np.sqrt((squares[0] / replicates - mean ** 2) / (replicates - 1)))
+
+
+def enumerable(hole, board, dead):
+    return enumeration_size(hole, board, dead) <= EXACT_MAX_COMBOS
+
+
+def rng_random(rng):
+    '''
+    A random.Random seeded from a numpy Generator, for monte_carlo_strength.
+    '''
+    return random.Random(int(rng.integers(2 ** 63)))
+
+
+def anytime_sample(hole, board, dead, rng, budget):
+    (strengths, errors), samples = anytime_estimates([(hole, board, dead)], rng, budget)
+    return strengths[0], samples
+
+
+def make_backends(iters_list, budget, seed):
+    '''
+    The backends to compare, each a function of (hole, board, dead, rng) that
+    returns (equity, samples) or None on streets where it doesn't apply.
+    Samples are scored opponent hands, whether sampled or enumerated.
+    '''
+    backends = {}
+    for iters in iters_list:
+        backends['eval7/%d' % iters] = lambda hole, board, dead, rng, iters=iters: (
+            monte_carlo_strength([int_to_card(card) for card in hole], iters, [int_to_card(card) for card in board], [int_to_card(card) for card in dead], rng=rng_random(rng)), iters)
+        backends['batch/%d' % iters] = lambda hole, board, dead, rng, iters=iters: (
+            batch_strength([(hole, board, dead)], iters, rng)[0], sample_count(iters))
+    backends['anytime'] = lambda hole, board, dead, rng: anytime_sample(hole, board, dead, rng, budget)
+    backends['exact'] = lambda hole, board, dead, rng: (
+        (exact_strength(hole, board, dead), enumeration_size(hole, board, dead)) if enumerable(hole, board, dead) else None)
+    backends['board_eval'] = lambda hole, board, dead, rng: (
+        (BoardEvaluation(hole, dead).advance(board).exact_strength(), enumeration_size(hole, board, dead)) if enumerable(hole, board, dead) else None)
+
+    player.SEED = seed
+    bot = player.Player()
+    bot.time_budget = FixedBudget(budget)
+    def player_backend(hole, board, dead, rng):
+        bot.time_budget.last_samples = 0
+        strength = bot.calcualte_strength(hole, player.NUM_ITERS, board, dead)
+        samples = bot.time_budget.last_samples
+        if samples == 0 and enumerable(hole, board, dead):
+            samples = enumeration_size(hole, board, dead)
+        return strength, samples
+    backends['player'] = player_backend
+    return backends
+
+
+def bench(corpus, references, backends, repeats, seed):
+    '''
+    Runs every backend on every situation 'repeats' times, with the equity
+    cache cleared before each call so nothing is served from an earlier one.
+    Returns:
+    a dict from (backend, street) to lists of (seconds, samples, absolute error)
+    '''
+    results = {}
+    for name, backend in backends.items():
+        rng = np.random.default_rng(seed)
+        for _ in range(repeats):
+            for (street, hole, board, dead), (reference, _) in zip(corpus, references):
+                EQUITY_CACHE.clear()
+                start = time.perf_counter()
+                result = backend(hole, board, dead, rng)
+                seconds = time.perf_counter() - start
+                if result is None:
+                    continue
+                strength, samples = result
+                results.setdefault((name, street), []).append((seconds, samples, abs(strength - reference)))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the accuracy and speed of the equity backends.')
+    parser.add_argument('--situations', type=int, default=25, help='situations per street')
+    parser.add_argument('--iters', type=int, nargs='+', default=[100, 1000], help='sample counts for the fixed-size samplers')
+    parser.add_argument('--budget', type=float, default=.05, help='seconds per decision for the anytime and player backends')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0, help='sampling seed, the corpus is always the same')
+    parser.add_argument('--backends', nargs='+', default=None, help='only run these backends, e.g. batch/100 player')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.situations)
+    reference_rng = np.random.default_rng(args.seed)
+    references = [reference_equity(hole, board, dead, reference_rng) for street, hole, board, dead in corpus]
+    preflop_errors = [error for (street, *_), (_, error) in zip(corpus, references) if street == 0]
+    print('preflop reference standard error: mean %.5f, max %.5f' % (np.mean(preflop_errors), np.max(preflop_errors)))
+
+    backends = make_backends(args.iters, args.budget, args.seed)
+    if args.backends is not None:
+        backends = {name: backends[name] for name in args.backends}
+    results = bench(corpus, references, backends, args.repeats, args.seed)
+    print('%-12s %6s %6s %14s %9s %9s %10s %10s' % ('backend', 'street', 'calls', 'samples/s', 'mae', 'max err', 'p50 ms', 'p99 ms'))
+    for (name, street), rows in results.items():
+        seconds, samples, errors = (np.array(column, dtype=float) for column in zip(*rows))
+        millis = seconds * 1000
+        print('%-12s %6d %6d %14.0f %9.5f %9.5f %10.3f %10.3f' % (name, street, len(rows), samples.sum() / seconds.sum(), errors.mean(), errors.max(), np.percentile(millis, 50), np.percentile(millis, 99)))
@@ -0,0 +1,60 @@
+'''
+Microbenchmark for get_actions latency. A seeded, deterministic match against
+RandomBot is recorded once with the decision log, then replayed through fresh
+Players several times, so every run times the same decisions with the same
+equity work and only the per-decision overhead can change.
+
+    python bench_hot_path.py --rounds 100 --repeats 3
+'''
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import numpy as np
+import player
+import replay
+from simulator import Match
+from tournament import RandomBot
+
+
+def record_match(path, rounds, seed):
+    player.SEED = seed
+    player.DETERMINISTIC = True
+    player.DECISION_LOG_PATH = path
+    with contextlib.redirect_stdout(io.StringIO()):
+        Match([player.Player(), RandomBot(seed)], rounds, float('inf'), seed).play()
+    player.DECISION_LOG_PATH = None
+
+
+def bench(path, repeats, idle=0.):
+    '''
+    Arguments:
+    idle: seconds to wait before each callback, see replay.replay
+    Returns:
+    a dict from street to the get_actions latencies (seconds) over all repeats
+    '''
+    latencies = {}
+    for _ in range(repeats):
+        for decision in replay.replay(path, idle=idle):
+            latencies.setdefault(decision['street'], []).append(decision['seconds'])
+    return latencies
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time get_actions on a recorded match.')
+    parser.add_argument('--log', default=None, help='replay this decision log instead of recording a new match')
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--idle', type=float, default=0., help='seconds of waiting on the engine to simulate before each callback')
+    parser.add_argument('--no-speculation', action='store_true')
+    args = parser.parse_args()
+    path = args.log
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), 'bench.dlog')
+        record_match(path, args.rounds, args.seed)
+    player.SPECULATE = not args.no_speculation
+    for street, seconds in sorted(bench(path, args.repeats, args.idle).items()):
+        millis = np.array(seconds) * 1000
+        print('street %d: %5d decisions, mean %.3f ms, p50 %.3f ms, p99 %.3f ms' % (street, len(millis), millis.mean(), np.percentile(millis, 50), np.percentile(millis, 99)))
@@ -0,0 +1,86 @@
+'''
+Nearest-neighbour index over the opponent's post-flop bets.
+'''
+import numpy as np
+
+
+class BetStrengthIndex():
+    '''
+    The opponent's post-flop bets (the pot odds they offered us) together with
+    how strong their hand turned out to be, kept sorted by bet size in
+    preallocated arrays. add() only appends to a pending buffer; the first
+    query after some adds merges the buffer in, which copies the full arrays,
+    O(n + p log p) for p pending entries. The bot adds once per round and
+    queries during the next, so in practice every round pays one O(n) merge
+    (some tens of microseconds with a few thousand bets) and the other
+    queries that round are a binary search plus k steps outwards.
+    '''
+
+    def __init__(self, capacity=1024):
+        self.bets = np.empty(capacity)
+        self.strengths = np.empty(capacity)
+        self.size = 0
+        self.pending = [] #(bet, strength) pairs not merged in yet
+
+    def __len__(self):
+        return self.size + len(self.pending)
+
+    def add(self, bet, strength):
+        '''
+        Records one opponent bet. 'strength' may be None if we never saw their
+        cards, in which case the bet still counts as a neighbour but is left out
+        of the averages.
+        '''
+        self.pending.append((bet, np.nan if strength is None else strength))
+
+    def _merge(self):
+        pending = sorted(self.pending)
+        self.pending = []
+        total = self.size + len(pending)
+        if total > len(self.bets): #double the buffers when they fill up
+            capacity = max(total, 2 * len(self.bets))
+            self.bets = np.concatenate([self.bets[:self.size], np.empty(capacity - self.size)])
+            self.strengths = np.concatenate([self.strengths[:self.size], np.empty(capacity - self.size)])
+        new_bets = np.array([bet for bet, _ in pending])
+        new_strengths = np.array([strength for _, strength in pending])
+
+        #where each new entry lands once the old ones have been shifted past it
+        positions = np.searchsorted(self.bets[:self.size], new_bets, side='right') + np.arange(len(pending))
+        keep_old = np.ones(total, dtype=bool)
+        keep_old[positions] = False
+        old_bets = self.bets[:self.size].copy()
+        old_strengths = self.strengths[:self.size].copy()
+        self.bets[:total][keep_old] = old_bets
+        self.strengths[:total][keep_old] = old_strengths
+        self.bets[positions] = new_bets
+        self.strengths[positions] = new_strengths
+        self.size = total
+
+    def nearest(self, bet, k):
+        '''
+        Returns the strengths recorded for the k bets closest in size to 'bet'.
+        '''
+        if self.pending:
+            self._merge()
+        bets = self.bets[:self.size]
+        lo = int(np.searchsorted(bets, bet)) - 1
+        hi = lo + 1
+        for _ in range(min(k, self.size)): #walk outwards taking the closer neighbour each step
+            if hi >= self.size or (lo >= 0 and bet - bets[lo] <= bets[hi] - bet):
+                lo -= 1
+            else:
+                hi += 1
+        return self.strengths[lo + 1: hi]
+
+    def strength_stats(self, bet, k):
+        '''
+        Mean and median strength of the k bets closest in size to 'bet',
+        ignoring bets whose strength is unknown.
+        Returns:
+        a (mean, median) tuple, both nan if none of the neighbours are known
+        '''
+        strengths = self.nearest(bet, k)
+        strengths = strengths[~np.isnan(strengths)]
+        if len(strengths) == 0:
+            return np.nan, np.nan
+        return float(strengths.mean()), float(np.median(strengths))
@@ -0,0 +1,113 @@
+'''
+Per-board evaluation state that lives for a round and is carried from street
+to street, so equity on a later street builds on the work of the earlier one.
+'''
+import functools
+import itertools
+import numpy as np
+import fast_eval
+from cards import card_mask, canonical_situation
+from equity import deck_from_mask
+from equity_cache import EQUITY_CACHE
+from opp_range import COMBOS, CARD_COMBOS
+
+
+@functools.lru_cache(maxsize=None)
+def _runout_indices(num_deck, num_runout):
+    runouts = list(itertools.combinations(range(num_deck), num_runout))
+    return np.array(runouts, dtype=np.intp).reshape(len(runouts), num_runout)
+
+
+class BoardEvaluation():
+    '''
+    One board's equity state: the cards that can still come (as a known card
+    mask), the opponent holdings still possible, and the evaluator's
+    accumulators for the board with and without our hole cards. advance()
+    folds in only the new board cards. Enumerating the turn scores every
+    (river, opp hand) pair anyway, so it also records our equity for each
+    river card, and the river is then a lookup.
+    '''
+    __slots__ = ('hole', 'dead', 'board', 'known_mask', 'live_combos', 'board_hand', 'our_hand', 'strength', 'next_strengths')
+
+    def __init__(self, hole, dead):
+        '''
+        Arguments:
+        hole: our two hole cards on the board, as card ints
+        dead: our other four cards, as card ints
+        '''
+        self.hole = list(hole)
+        self.dead = list(dead)
+        self.board = []
+        self.known_mask = card_mask(self.hole + self.dead)
+        self.live_combos = ~CARD_COMBOS[self.hole + self.dead].any(axis=0) #(1326,) opp holdings that can still be dealt
+        self.board_hand = fast_eval.EMPTY_HAND
+        self.our_hand = fast_eval.add_cards(fast_eval.EMPTY_HAND, self.hole)
+        self.strength = None #exact equity on the current board, once known
+        self.next_strengths = {} #next card -> exact equity once it comes, from this street's enumeration
+
+    def copy(self):
+        other = BoardEvaluation.__new__(BoardEvaluation)
+        for name in BoardEvaluation.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def advance(self, board):
+        '''
+        Brings the state up to 'board', the board cards dealt so far as card ints.
+        '''
+        new_cards = board[len(self.board):]
+        if len(new_cards) == 0:
+            return self
+        self.known_mask |= card_mask(new_cards)
+        self.live_combos = self.live_combos & ~CARD_COMBOS[new_cards].any(axis=0) #a new array, copies may share the old one
+        self.board_hand = fast_eval.add_cards(self.board_hand, new_cards)
+        self.our_hand = fast_eval.add_cards(self.our_hand, new_cards)
+        self.strength = self.next_strengths.get(new_cards[0]) if len(new_cards) == 1 else None
+        self.next_strengths = {}
+        self.board = self.board + list(new_cards)
+        return self
+
+    def branch(self, card):
+        '''
+        A copy of the state with 'card' dealt next, this one is left as it is.
+        '''
+        return self.copy().advance(self.board + [card])
+
+    def exact_strength(self):
+        '''
+        Our exact win probability on the current board: carried over from
+        the previous street, found in EQUITY_CACHE, or enumerated from the
+        carried state (and then cached). Only cheap on the turn and river,
+        see equity.enumeration_size.
+        '''
+        if self.strength is not None:
+            return self.strength
+        key = canonical_situation(self.hole, self.board, self.dead)
+        strength = EQUITY_CACHE.get(key)
+        if strength is None:
+            strength = self._enumerate()
+            EQUITY_CACHE.put(key, strength)
+        self.strength = strength
+        return strength
+
+    def _enumerate(self):
+        deck = deck_from_mask(self.known_mask)
+        num_runout = 5 - len(self.board)
+        runouts = deck[_runout_indices(len(deck), num_runout)] #(R, cards to come)
+        opp_holes = COMBOS[self.live_combos]
+        collides = CARD_COMBOS[:, self.live_combos][runouts].any(axis=1) #(R, opp holes) a run-out card in the opp's hand
+        runout_index, opp_index = np.nonzero(~collides)
+
+        our_values = fast_eval.evaluate(runouts, self.our_hand) #the board and our hole cards are already folded in
+        opp_hands = np.empty((len(runout_index), 2 + num_runout), dtype=np.int32)
+        opp_hands[:, :2] = opp_holes[opp_index]
+        opp_hands[:, 2:] = runouts[runout_index]
+        opp_values = fast_eval.evaluate(opp_hands, self.board_hand)
+
+        our_values = our_values[runout_index]
+        score = 2 * (our_values > opp_values) + (our_values == opp_values)
+        if num_runout == 1:
+            sums = np.bincount(runout_index, weights=score, minlength=len(runouts))
+            counts = np.bincount(runout_index, minlength=len(runouts))
+            self.next_strengths = dict(zip(runouts[:, 0].tolist(), (sums / (2 * counts)).tolist()))
+        return float(score.sum()) / (2 * len(score))
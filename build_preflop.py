@@ -0,0 +1,165 @@
+'''
+Builds the preflop hand strength tables (hand_strengths.p and
+hand_strengths.f32, see preflop.py) from exact heads-up equities: every
+starting hand class against every opponent hand on every board. Takes about
+a minute and a half on one core and can be stopped and resumed.
+
+    python build_preflop.py --workers 8
+'''
+import argparse
+import itertools
+import math
+import multiprocessing
+import os
+import pickle
+import time
+import numpy as np
+import fast_eval
+from cards import RANKS, SUIT_PERMUTATIONS
+from preflop import CLASS_INDEX, CLASS_STRENGTHS_PATH, HAND_STRENGTHS_PATH, NUM_CLASSES, class_strengths_from_dict
+
+CHECKPOINT_PATH = 'hand_strengths.ckpt'
+BUILD_CHUNK = 256 #canonical boards per job
+CHECKPOINT_SECONDS = 30.
+
+CLASS_COMBOS = np.bincount(CLASS_INDEX[np.triu_indices(52, 1)], minlength=NUM_CLASSES) #hole card combos per class: 6, 4 or 12
+HOLE_POSITIONS = np.array(list(itertools.combinations(range(47), 2))) #(1081, 2) hole cards as positions among the 47 cards off a board
+POSITION_HOLES = np.array([np.nonzero((HOLE_POSITIONS == position).any(axis=1))[0] for position in range(47)]) #(47, 46) the holes holding each position
+BOARD_SHIFTS = np.array([24, 18, 12, 6, 0])
+
+
+def class_keys():
+    '''
+    The hand_strengths.p key of every class slot.
+    '''
+    keys = {}
+    for low, high in itertools.combinations_with_replacement(range(13), 2):
+        if low == high:
+            keys[14 * low] = (RANKS[low], RANKS[low])
+        else:
+            keys[13 * high + low] = (RANKS[low], RANKS[high], 'same')
+            keys[13 * low + high] = (RANKS[low], RANKS[high], 'diff')
+    return keys
+
+
+def canonical_boards():
+    '''
+    Every 5 card board up to relabeling the suits. Class equities don't
+    change under a relabeling, so each of these stands in for all the
+    boards it relabels to.
+    Returns:
+    a (B, 5) array of boards and a (B,) array of how many boards each stands for
+    '''
+    boards = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(52), 5)), dtype=np.int64, count=5 * math.comb(52, 5)).reshape(-1, 5)
+    keys = None
+    for permutation in SUIT_PERMUTATIONS:
+        relabeled = np.sort(boards - boards % 4 + np.array(permutation)[boards % 4], axis=1)
+        packed = (relabeled << BOARD_SHIFTS).sum(axis=1)
+        keys = packed if keys is None else np.minimum(keys, packed)
+    keys, counts = np.unique(keys, return_counts=True)
+    return (keys[:, None] >> BOARD_SHIFTS) & 63, counts
+
+
+def _board_counts(job):
+    '''
+    Counts, for every hole combo on each board, the opponent hands it beats
+    and ties. All 1081 hands on a board are scored once and ranked against
+    each other, then the hands that share a card with ours are taken back
+    out per card, so no (hole, opponent) pair is ever evaluated twice.
+    Arguments:
+    job: a (boards, counts) slice of canonical_boards()
+    Returns:
+    the wins and ties of each class, weighted by the board counts
+    '''
+    boards, counts = job
+    num_boards = len(boards)
+    live = np.ones((num_boards, 52), dtype=bool)
+    live[np.arange(num_boards)[:, None], boards] = False
+    decks = np.nonzero(live)[1].reshape(num_boards, 47)
+    holes = decks[:, HOLE_POSITIONS] #(K, 1081, 2)
+    hands = np.concatenate([holes, np.broadcast_to(boards[:, None, :], (num_boards, len(HOLE_POSITIONS), 5))], axis=2)
+    values = fast_eval.evaluate(hands.reshape(-1, 7)).reshape(num_boards, -1).astype(np.int64)
+
+    #rank every hand within its board, boards kept apart by an offset above the hand values
+    keys = values + (np.arange(num_boards)[:, None] << 32)
+    ordered = np.sort(keys, axis=None)
+    first = np.arange(num_boards)[:, None] * len(HOLE_POSITIONS)
+    below = np.searchsorted(ordered, keys, 'left') - first
+    equal = np.searchsorted(ordered, keys, 'right') - first - below #includes our own hand
+
+    #the same for the 46 hands holding each card, to take the opp hands that collide with ours back out
+    groups = np.arange(num_boards)[:, None] * 47 + HOLE_POSITIONS.T[:, None, :] #(2, K, 1081) the card group of each of our two cards
+    card_keys = values[:, POSITION_HOLES] + (np.arange(num_boards * 47).reshape(num_boards, 47, 1) << 32)
+    card_ordered = np.sort(card_keys, axis=None)
+    queries = values + (groups << 32)
+    card_below = np.searchsorted(card_ordered, queries, 'left')
+    card_equal = np.searchsorted(card_ordered, queries, 'right') - card_below
+    card_below = card_below - groups * 46
+
+    wins = below - card_below.sum(axis=0)
+    ties = equal - card_equal.sum(axis=0) + 1 #our own hand holds both cards, so it was taken out twice
+    slots = CLASS_INDEX[holes[:, :, 0], holes[:, :, 1]].ravel()
+    weights = counts[:, None]
+    return (np.bincount(slots, weights=(wins * weights).ravel(), minlength=NUM_CLASSES),
+            np.bincount(slots, weights=(ties * weights).ravel(), minlength=NUM_CLASSES))
+
+
+def _save_checkpoint(path, wins, ties, done, num_jobs):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as fp:
+        np.savez(fp, wins=wins, ties=ties, done=done, num_jobs=num_jobs)
+    os.replace(temp_path, path) #the old checkpoint stays whole until the new one is
+
+
+def build_hand_strengths(pickle_path=HAND_STRENGTHS_PATH, path=CLASS_STRENGTHS_PATH, workers=None, checkpoint_path=CHECKPOINT_PATH, chunk=BUILD_CHUNK):
+    '''
+    Computes the exact heads-up win and draw probability of every starting
+    hand class against a random opponent hand, over every board, and writes
+    them as the legacy pickle and the float32 array. Progress is saved to
+    'checkpoint_path' every CHECKPOINT_SECONDS, and a build that was cut
+    off picks up from there when run again with the same 'chunk'.
+    Arguments:
+    workers: number of processes to use (defaults to all cores)
+    chunk: canonical boards per job
+    '''
+    start = time.perf_counter()
+    boards, counts = canonical_boards()
+    jobs = [(boards[first: first + chunk], counts[first: first + chunk]) for first in range(0, len(boards), chunk)]
+    wins = np.zeros(NUM_CLASSES)
+    ties = np.zeros(NUM_CLASSES)
+    done = 0
+    if os.path.exists(checkpoint_path):
+        checkpoint = np.load(checkpoint_path)
+        if int(checkpoint['num_jobs']) == len(jobs):
+            wins, ties, done = checkpoint['wins'], checkpoint['ties'], int(checkpoint['done'])
+            print('resuming at job', done, 'of', len(jobs))
+    saved = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for job_wins, job_ties in pool.imap(_board_counts, jobs[done:]): #in order, so the finished jobs are always a prefix
+            wins += job_wins
+            ties += job_ties
+            done += 1
+            if time.perf_counter() - saved >= CHECKPOINT_SECONDS:
+                _save_checkpoint(checkpoint_path, wins, ties, done, len(jobs))
+                saved = time.perf_counter()
+                print('jobs done:', done, 'of', len(jobs))
+
+    totals = CLASS_COMBOS * math.comb(50, 5) * math.comb(45, 2) #(hole, board, opp hand) deals per class
+    hand_strengths = {key: {'win_prob': float(wins[slot] / totals[slot]), 'draw_prob': float(ties[slot] / totals[slot])} for slot, key in class_keys().items()}
+    with open(pickle_path, 'wb') as fp:
+        pickle.dump(hand_strengths, fp)
+    class_strengths_from_dict(hand_strengths).tofile(path)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print('built', len(hand_strengths), 'classes in %.1f s' % (time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the preflop hand strength tables from exact equities.')
+    parser.add_argument('--out', default=HAND_STRENGTHS_PATH, help='the legacy pickle')
+    parser.add_argument('--array-out', default=CLASS_STRENGTHS_PATH, help='the float32 array')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--chunk', type=int, default=BUILD_CHUNK)
+    args = parser.parse_args()
+    build_hand_strengths(args.out, args.array_out, args.workers, args.checkpoint, args.chunk)
@@ -0,0 +1,116 @@
+'''
+Card encoding helpers shared by the equity code. Cards arrive from the engine
+as two character strings like 'As' or 'Td'; here we map them to integers
+0..51 (rank * 4 + suit) so they can be packed into keys and numpy arrays.
+'''
+import functools
+import itertools
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+SUIT_PERMUTATIONS = list(itertools.permutations(range(4))) # all 24 ways to relabel the suits
+CARD_IDS = {rank + suit: RANKS.index(rank) * 4 + SUITS.index(suit) for rank in RANKS for suit in SUITS}
+CARD_IDS.update({card_id: card_id for card_id in range(52)}) #cards that are already integers pass straight through
+
+
+def card_to_int(card):
+    '''
+    Converts a card string like 'As' into an integer in 0..51.
+    '''
+    return CARD_IDS[card]
+
+
+def int_to_card(card_id):
+    '''
+    Converts an integer in 0..51 back into a card string.
+    '''
+    return RANKS[card_id // 4] + SUITS[card_id % 4]
+
+
+def parse_cards(cards):
+    '''
+    Converts a list of card strings into integers, skipping the '' placeholders
+    the engine uses for board cards that have not been dealt yet. Lists that
+    are already integers come back as they are, so callers can parse once and
+    pass the integers around.
+    '''
+    return [CARD_IDS[card] for card in cards if card != '']
+
+
+def card_mask(cards):
+    '''
+    A 52 bit mask with a bit set for each of the given cards (strings or integers).
+    '''
+    mask = 0
+    for card in parse_cards(cards):
+        mask |= 1 << card
+    return mask
+
+
+@functools.lru_cache(maxsize=None)
+def _hole_relabelings(hole):
+    '''
+    Finds the canonical form of a sorted hole tuple together with the suit
+    relabelings (as 52 entry lookup lists) that produce it. Only these need
+    to be tried on the board, which keeps canonical_cards cheap.
+    '''
+    best_hole = None
+    relabelings = []
+    for perm in SUIT_PERMUTATIONS:
+        relabel = [card - card % 4 + perm[card % 4] for card in range(52)]
+        canon_hole = tuple(sorted(relabel[card] for card in hole))
+        if best_hole is None or canon_hole < best_hole:
+            best_hole = canon_hole
+            relabelings = [relabel]
+        elif canon_hole == best_hole:
+            relabelings.append(relabel)
+    return best_hole, relabelings
+
+
+def canonical_cards(hole, board):
+    '''
+    Maps a (hole, board) situation onto its suit-isomorphic representative:
+    of the 24 suit relabelings, the lexicographically smallest (sorted hole,
+    sorted board) is kept. Two situations with the same representative have
+    exactly the same equity.
+    Arguments:
+    hole: a list of our two hole cards as integers
+    board: a list of 0 to 5 board cards as integers
+    Returns:
+    a tuple of (hole tuple, board tuple)
+    '''
+    canon_hole, relabelings = _hole_relabelings(tuple(sorted(hole)))
+    best_board = None
+    for relabel in relabelings:
+        canon_board = tuple(sorted([relabel[card] for card in board]))
+        if best_board is None or canon_board < best_board:
+            best_board = canon_board
+    return canon_hole, best_board
+
+
+def canonical_situation(hole, board, dead):
+    '''
+    canonical_cards extended with dead cards: the suit relabeling that gives
+    the smallest (hole, board, dead) is used, so any two situations that are
+    the same up to suits share one representative.
+    Returns:
+    a tuple of (hole tuple, board tuple, dead tuple)
+    '''
+    canon_hole, relabelings = _hole_relabelings(tuple(sorted(hole)))
+    best = None
+    for relabel in relabelings:
+        canon_rest = (tuple(sorted([relabel[card] for card in board])), tuple(sorted([relabel[card] for card in dead])))
+        if best is None or canon_rest < best:
+            best = canon_rest
+    return (canon_hole,) + best
+
+
+def pack_cards(cards):
+    '''
+    Packs up to ten integer cards into a single int, 6 bits per card, so a
+    canonical situation can be stored as one uint64 key.
+    '''
+    key = 0
+    for i, card in enumerate(cards):
+        key |= (card + 1) << (6 * i) # +1 so that card 0 differs from a missing card
+    return key
@@ -0,0 +1,318 @@
+'''
+Counterfactual evaluation of the get_actions constants over match history.
+Engine game logs are parsed into a columnar store (game_log.py), every round
+is rebuilt in the simulator from the logged actions and our bot's callbacks
+are played into a fresh Player with a set of constants changed, while the
+round itself always goes on the way it was logged. Each decision the
+variant makes on a board where we know the opponent's cards (they showed
+them, or the log has the deal) is scored against those cards, and variants
+are compared with the current constants on the same decisions.
+
+The score is one step deep: a fold loses what we have put into the board,
+anything else puts our chips after the action (a raise assumed called) at
+stake at our equity against the opp's actual hand over the rest of the
+actual board. Later streets and how the opponent would have answered a
+different action are not modeled, so this ranks variants for a closer look
+in live matches rather than replacing them.
+
+    python counterfactual.py logs/*.txt --name A --grid SB_FOLD_BELOW=.35,.39,.43 OPEN_RAISE=5,6,8
+'''
+import argparse
+import ast
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import numpy as np
+import fast_eval
+import player
+from cards import int_to_card, card_to_int
+from equity import deal_runouts
+from equity_cache import EQUITY_CACHE
+from game_log import parse_game_log, concat_stores, write_store, load_store, FOLD, CALL, CHECK, RAISE, ASSIGN, UNKNOWN
+from simulator import SimRound, STARTING_GAME_CLOCK
+from skeleton.actions import FoldAction, CallAction, CheckAction, RaiseAction, AssignAction
+from skeleton.states import GameState, TerminalState, BoardState, NUM_BOARDS
+
+PARAMETERS = ('SB_FOLD_BELOW', 'SB_LIMP_BELOW', 'OPEN_RAISE', 'PREFLOP_RAISE_ABOVE', 'RERAISE_POT_MULTIPLE', 'LIMP_RAISE', 'INTIMIDATION') #player.py constants a variant may set
+MATCHUP_SAMPLES = 2000 #run-outs sampled for a hand vs hand equity with more than two board cards to come
+ACTION_CODES = {FoldAction: FOLD, CallAction: CALL, CheckAction: CHECK, RaiseAction: RAISE, AssignAction: ASSIGN}
+
+_store = None #the store and warm equity cache of a worker process, see _init_worker
+_warm_cache = []
+
+
+def parse_grid(specs):
+    '''
+    Expands NAME=value,value,... specs (NAME.key for an entry of a dict
+    constant like INTIMIDATION.Raise) into every combination of the values.
+    Returns:
+    a list of {name: value} variants
+    '''
+    names, choices = [], []
+    for spec in specs:
+        name, values = spec.split('=', 1)
+        if name.partition('.')[0] not in PARAMETERS:
+            raise ValueError('not a tunable constant: ' + name)
+        names.append(name)
+        choices.append([ast.literal_eval(value) for value in values.split(',')])
+    return [dict(zip(names, values)) for values in itertools.product(*choices)]
+
+
+def apply_parameters(params):
+    '''
+    Sets the player.py constants of a variant.
+    Returns:
+    the values they had, to hand back to apply_parameters afterwards
+    '''
+    previous = {}
+    for name, value in params.items():
+        base, _, key = name.partition('.')
+        previous.setdefault(base, getattr(player, base))
+        setattr(player, base, dict(getattr(player, base), **{key: value}) if key else value)
+    return previous
+
+
+def _round_deck(store, r):
+    '''
+    A deck the simulator can replay round 'r' from: both hands by seat, then
+    the three run-outs, with the cards the log never showed filled in from
+    the cards nobody is known to hold.
+    '''
+    seat = store['seat'][r]
+    hands = store['hands'][r].astype(int).tolist()
+    for player_index in range(2):
+        if UNKNOWN in hands[player_index]: #assembled from what they assigned and showed
+            assigned = [card for card in store['holes'][r, player_index].ravel().tolist() if card != UNKNOWN]
+            hands[player_index] = assigned + [UNKNOWN] * (6 - len(assigned))
+    boards = store['boards'][r].astype(int).tolist()
+    known = set(card for cards in hands + boards for card in cards if card != UNKNOWN)
+    spare = iter(card for card in range(52) if card not in known)
+    deck = hands[seat] + hands[1 - seat] + [card for board in boards for card in board]
+    return [int_to_card(card if card != UNKNOWN else next(spare)) for card in deck]
+
+
+def _logged_actions(store, r, rows):
+    actions = [None] * NUM_BOARDS
+    for row in rows:
+        board, kind, player_index = store['action_board'][row], store['action_kind'][row], store['action_player'][row]
+        if kind == ASSIGN:
+            hole = store['holes'][r, player_index, board].tolist()
+            actions[board] = AssignAction([int_to_card(card) for card in hole] if UNKNOWN not in hole else None)
+        elif kind == RAISE:
+            actions[board] = RaiseAction(int(store['action_amount'][row]))
+        else:
+            actions[board] = [FoldAction, CallAction, CheckAction][kind]()
+    return actions
+
+
+def round_callbacks(store, r, rows):
+    '''
+    Replays round 'r' in the simulator from its logged actions ('rows' of
+    the action columns, in log order) and yields the callbacks our bot got:
+    ('new_round', game_state, round_state), ('actions', game_state,
+    round_state, logged actions) and ('round_over', game_state, terminal_state).
+    '''
+    seat = int(store['seat'][r])
+    round_ = SimRound(_round_deck(store, r))
+    game_state = GameState(int(store['bankrolls'][r, 0]), int(store['bankrolls'][r, 1]), STARTING_GAME_CLOCK, int(store['round_num'][r]))
+    yield 'new_round', game_state, round_.view(seat)
+    calls = store['action_call'][rows]
+    for call in np.unique(calls): #calls are numbered in log order
+        call_rows = rows[calls == call]
+        acting = seat if store['action_player'][call_rows[0]] == 0 else 1 - seat
+        if round_.is_over() or round_.active() != acting:
+            raise ValueError('round %d: the logged actions are out of turn' % store['round_num'][r])
+        actions = _logged_actions(store, r, call_rows)
+        if acting == seat:
+            yield 'actions', game_state, round_.view(seat), actions
+        round_.apply(actions)
+    if not round_.is_over():
+        raise ValueError('round %d: the log stops before the round ends' % store['round_num'][r])
+    deltas = [sum(board.deltas[player_index] for board in round_.boards) for player_index in range(2)]
+    yield 'round_over', game_state, TerminalState(deltas, round_.view(seat, reveal=True))
+
+
+def matchup_equity(store, r, board):
+    '''
+    Our equity against the opp's actual hole cards on a board, over the
+    board cards that were never dealt. None if we don't know their cards.
+    '''
+    ours, theirs = store['holes'][r, 0, board].tolist(), store['holes'][r, 1, board].tolist()
+    if UNKNOWN in ours or UNKNOWN in theirs:
+        return None
+    dealt = [card for card in store['boards'][r, board].tolist() if card != UNKNOWN]
+    known = set(card for card in np.concatenate([store['hands'][r].ravel(), store['holes'][r].ravel(), store['boards'][r].ravel()]).tolist() if card != UNKNOWN)
+    deck = np.array([card for card in range(52) if card not in known], dtype=np.int32)
+    missing = 5 - len(dealt)
+    if missing <= 2:
+        runouts = list(itertools.combinations(deck, missing))
+        runouts = np.array(runouts, dtype=np.int32).reshape(len(runouts), missing)
+    else:
+        runouts = deal_runouts(deck, missing, MATCHUP_SAMPLES, np.random.default_rng([r, board])) #the same run-outs for every variant
+    fixed = np.tile(np.array(dealt, dtype=np.int32), (len(runouts), 1))
+    our_values = fast_eval.evaluate(np.concatenate([np.tile(ours, (len(runouts), 1)), fixed, runouts], axis=1))
+    opp_values = fast_eval.evaluate(np.concatenate([np.tile(theirs, (len(runouts), 1)), fixed, runouts], axis=1))
+    return float(np.mean((our_values > opp_values) + .5 * (our_values == opp_values)))
+
+
+def effective_action(action, legal, board_state, active, stacks):
+    '''
+    The action the engine would take for 'action' on a board: illegal ones
+    become a check or a fold, raises are whole chips within the bounds.
+    '''
+    if type(action) not in legal:
+        return CheckAction() if CheckAction in legal else FoldAction()
+    if isinstance(action, RaiseAction):
+        min_raise, max_raise = board_state.raise_bounds(active, stacks)
+        amount = int(action.amount)
+        return RaiseAction(amount if min_raise <= amount <= max_raise else min_raise)
+    return action
+
+
+def action_code(action):
+    return ACTION_CODES[type(action)] * 1000 + (action.amount if isinstance(action, RaiseAction) else 0)
+
+
+def action_value(action, board_state, active, equity):
+    '''
+    The one step score of an effective action, in chips.
+    '''
+    committed = board_state.pot / 2 #earlier streets, which both players matched
+    if isinstance(action, FoldAction):
+        return -(committed + board_state.pips[active])
+    if isinstance(action, CallAction):
+        committed += board_state.pips[1-active]
+    elif isinstance(action, RaiseAction):
+        committed += action.amount
+    else:
+        committed += board_state.pips[active]
+    return (2 * equity - 1) * committed
+
+
+def _init_worker(store, warm_cache):
+    global _store, _warm_cache
+    _store = store
+    _warm_cache = warm_cache
+
+
+def evaluate_variant(args):
+    '''
+    Plays the store's rounds into a Player with a variant's constants.
+    Arguments:
+    args: (params, seed), the store is the worker's
+    Returns:
+    the variant, and per (decision, board) the code of the effective action
+    (kind * 1000 + raise to), the code of the logged one and the score of
+    the variant's (nan where it can't be scored)
+    '''
+    params, seed = args
+    store = _store
+    previous = apply_parameters(params)
+    player.SEED = seed
+    player.DETERMINISTIC = True
+    player.SPECULATE = False
+    player.DECISION_LOG_PATH = None
+    player.OPPONENT_NAME = None
+    codes, logged_codes, values = [], [], []
+    order = np.argsort(store['action_round'], kind='stable')
+    bounds = np.searchsorted(store['action_round'][order], np.arange(len(store['round_num']) + 1))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            bot = player.Player()
+            for key, strength in _warm_cache: #Player clears the cache in deterministic mode
+                EQUITY_CACHE.put(key, strength)
+            for r in range(len(store['round_num'])):
+                active = int(store['seat'][r])
+                equities = {}
+                for callback in round_callbacks(store, r, order[bounds[r]: bounds[r + 1]]):
+                    kind, game_state, state = callback[:3]
+                    if kind == 'new_round':
+                        bot.handle_new_round(game_state, state, active)
+                        my_cards = [card_to_int(card) for card in state.hands[active]]
+                        bot.set_allocation(state.hands[active], [[my_cards.index(card) for card in hole] for hole in store['holes'][r, 0].tolist()]) #the boards as they were logged
+                    elif kind == 'round_over':
+                        bot.handle_round_over(game_state, state, active)
+                    else:
+                        actions = bot.get_actions(game_state, state, active)
+                        legal_actions = state.legal_actions()
+                        for i, board_state in enumerate(state.board_states):
+                            if not isinstance(board_state, BoardState) or AssignAction in legal_actions[i]:
+                                continue
+                            action = effective_action(actions[i], legal_actions[i], board_state, active, state.stacks)
+                            codes.append(action_code(action))
+                            logged_codes.append(action_code(effective_action(callback[3][i], legal_actions[i], board_state, active, state.stacks)))
+                            if i not in equities:
+                                equities[i] = matchup_equity(store, r, i)
+                            values.append(np.nan if equities[i] is None else action_value(action, board_state, active, equities[i]))
+                            bot.board_folds[i] = isinstance(callback[3][i], FoldAction) #the round goes on as logged, so does what the bot remembers of it
+            bot.background.close()
+            bot.speculator.close()
+    finally:
+        apply_parameters(previous)
+    return params, np.array(codes, dtype=np.int32), np.array(logged_codes, dtype=np.int32), np.array(values)
+
+
+def build_store(paths, name):
+    return concat_stores([parse_game_log(path, name) for path in paths])
+
+
+def run_variants(store, variants, seed=0, workers=None):
+    '''
+    Evaluates the current constants and every variant, in parallel. A
+    first pass in this process fills the equity cache, which every worker
+    then starts from, so all of them (the baseline too) see the same
+    equities, sampled ones included, and differ only by their constants.
+    Returns:
+    one summary dict per variant, best first, and the baseline's summary
+    '''
+    _init_worker(store, [])
+    evaluate_variant(({}, seed))
+    warm_cache = list(EQUITY_CACHE.entries.items())
+    rounds = len(store['round_num'])
+    summaries = []
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(store, warm_cache)) as pool:
+        results = pool.imap(evaluate_variant, [(params, seed) for params in [{}] + variants])
+        _, base_codes, logged_codes, base_values = next(results)
+        for params, codes, logged_codes, values in itertools.chain([({}, base_codes, logged_codes, base_values)], results):
+            changed = codes != base_codes
+            scored = changed & ~np.isnan(values) & ~np.isnan(base_values)
+            gain = float((values[scored] - base_values[scored]).sum())
+            summaries.append({
+                'params': params,
+                'decisions': len(codes),
+                'as_logged': int((codes == logged_codes).sum()), #decisions the variant makes the way the log has them
+                'changed': int(changed.sum()),
+                'scored': int(scored.sum()),
+                'chips': gain,
+                'chips_per_round': gain / max(1, rounds),
+            })
+    return sorted(summaries[1:], key=lambda summary: -summary['chips']), summaries[0]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score get_actions constants against logged matches.')
+    parser.add_argument('logs', nargs='*', help='engine game logs')
+    parser.add_argument('--name', help='our bot\'s name in the logs')
+    parser.add_argument('--store', default=None, help='.npz columnar store: read it if it exists and no logs are given, otherwise write it')
+    parser.add_argument('--grid', nargs='+', default=[], help='NAME=value,value,... for each constant to vary, e.g. OPEN_RAISE=5,6,8')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=20, help='how many variants to list')
+    args = parser.parse_args()
+    if args.logs:
+        store = build_store(args.logs, args.name)
+        if args.store is not None:
+            write_store(args.store, store)
+    elif args.store is not None and os.path.exists(args.store):
+        store = load_store(args.store)
+    else:
+        parser.error('give game logs or an existing --store')
+    variants = parse_grid(args.grid)
+    print('rounds:', len(store['round_num']), 'actions:', len(store['action_round']), 'variants:', len(variants))
+    summaries, baseline = run_variants(store, variants, args.seed, args.workers)
+    print('current constants: %d of %d decisions as logged' % (baseline['as_logged'], baseline['decisions']))
+    for summary in summaries[:args.top]:
+        print('%+10.1f chips (%+.3f per round) %5d of %d decisions changed, %d scored  %s' % (
+            summary['chips'], summary['chips_per_round'], summary['changed'], summary['decisions'], summary['scored'], summary['params']))
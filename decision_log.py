@@ -0,0 +1,172 @@
+'''
+Compact binary log of a match as the bot saw it: every callback's inputs,
+the actions get_actions chose, the equities behind them and how long each
+decision took. Together with the match seed this is enough to drive a Player
+through the same match again (see replay.py).
+
+The file is a header (magic, seed) followed by fixed layout records, one per
+callback, so a 500 round match is a few hundred kilobytes.
+'''
+import struct
+import time
+from skeleton.actions import FoldAction, CallAction, CheckAction, RaiseAction, AssignAction
+from skeleton.states import GameState, TerminalState, RoundState, BoardState, NUM_BOARDS, NUM_ROUNDS
+from cards import card_to_int, int_to_card
+
+MAGIC = b'DLG1'
+HEADER = struct.Struct('<4sQ') #magic, seed
+PREFIX = struct.Struct('<cHiifB') #kind, round_num, bankroll, opp_bankroll, game_clock, active
+ROUND = struct.Struct('<HB2h12B') #button, street, stacks, both players' six cards
+BOARD = struct.Struct('<Bh2h4B5BB2h') #terminal, pot, pips, both hands, deck, settled/reveal bits, deltas
+DELTAS = struct.Struct('<2h')
+DECISION = struct.Struct('<' + 'f' * NUM_BOARDS + 'BhBB' * NUM_BOARDS + 'f') #equities, (action, amount, assigned cards) per board, seconds
+
+NEW_ROUND, ACTIONS, ROUND_OVER = b'N', b'A', b'O'
+NO_CARD = 254 #an empty hand or an unused slot
+HIDDEN_CARD = 255 #a card the engine shows as ''
+ACTION_TYPES = [FoldAction, CallAction, CheckAction, RaiseAction, AssignAction]
+
+
+def _encode_cards(cards, size):
+    codes = [HIDDEN_CARD if card == '' else card_to_int(card) for card in cards]
+    return codes + [NO_CARD] * (size - len(codes))
+
+
+def _decode_cards(codes):
+    return [int_to_card(code) if code < 52 else '' for code in codes if code != NO_CARD]
+
+
+def _pack_round(round_state):
+    parts = [ROUND.pack(round_state.button, round_state.street, *round_state.stacks,
+                        *_encode_cards(round_state.hands[0], 6), *_encode_cards(round_state.hands[1], 6))]
+    for board_state in round_state.board_states:
+        terminal = isinstance(board_state, TerminalState)
+        inner = board_state.previous_state if terminal else board_state
+        deltas = board_state.deltas if terminal else [0, 0]
+        flags = int(bool(inner.settled)) | int(bool(getattr(inner, 'reveal', True))) << 1
+        parts.append(BOARD.pack(terminal, inner.pot, *inner.pips, *_encode_cards(inner.hands[0], 2), *_encode_cards(inner.hands[1], 2),
+                                *_encode_cards(inner.deck, 5), flags, *deltas))
+    return b''.join(parts)
+
+
+def _unpack_round(data, offset):
+    fields = ROUND.unpack_from(data, offset)
+    offset += ROUND.size
+    board_states = []
+    for _ in range(NUM_BOARDS):
+        board = BOARD.unpack_from(data, offset)
+        offset += BOARD.size
+        board_state = BoardState(pot=board[1], pips=list(board[2:4]), hands=[_decode_cards(board[4:6]), _decode_cards(board[6:8])],
+                                 deck=_decode_cards(board[8:13]), previous_state=None, settled=bool(board[13] & 1), reveal=bool(board[13] & 2))
+        if board[0]:
+            board_state = TerminalState(list(board[14:16]), board_state)
+        board_states.append(board_state)
+    round_state = RoundState(button=fields[0], street=fields[1], stacks=list(fields[2:4]),
+                             hands=[_decode_cards(fields[4:10]), _decode_cards(fields[10:16])], board_states=board_states, previous_state=None)
+    return round_state, offset
+
+
+def _pack_action(action):
+    kind = ACTION_TYPES.index(type(action))
+    amount = int(action.amount) if isinstance(action, RaiseAction) else 0
+    cards = _encode_cards(action.cards, 2) if isinstance(action, AssignAction) else [NO_CARD, NO_CARD]
+    return [kind, amount] + cards
+
+
+def _unpack_action(kind, amount, *cards):
+    action_type = ACTION_TYPES[kind]
+    if action_type is RaiseAction:
+        return RaiseAction(amount)
+    if action_type is AssignAction:
+        return AssignAction(_decode_cards(cards))
+    return action_type()
+
+
+class DecisionLog():
+    '''
+    Writes the log. attach() wraps a bot's callbacks so every call is
+    recorded after it returns, the same way Profiler.instrument times them.
+    '''
+
+    def __init__(self, path, seed):
+        self.fp = open(path, 'wb')
+        self.fp.write(HEADER.pack(MAGIC, seed))
+
+    def attach(self, bot, equities):
+        '''
+        Arguments:
+        equities: a function of (round_state) returning the equity used on each
+        board in the decision just made (None where there was none)
+        '''
+        handle_new_round, get_actions, handle_round_over = bot.handle_new_round, bot.get_actions, bot.handle_round_over
+
+        def logged_new_round(game_state, round_state, active):
+            handle_new_round(game_state, round_state, active)
+            self.write(NEW_ROUND, game_state, active, _pack_round(round_state))
+
+        def logged_get_actions(game_state, round_state, active):
+            start = time.perf_counter()
+            actions = get_actions(game_state, round_state, active)
+            seconds = time.perf_counter() - start
+            self.write(ACTIONS, game_state, active, _pack_round(round_state) + self.pack_decision(actions, equities(round_state), seconds))
+            return actions
+
+        def logged_round_over(game_state, terminal_state, active):
+            handle_round_over(game_state, terminal_state, active)
+            self.write(ROUND_OVER, game_state, active, DELTAS.pack(*terminal_state.deltas) + _pack_round(terminal_state.previous_state))
+            if game_state.round_num == NUM_ROUNDS:
+                self.close()
+            else:
+                self.fp.flush() #so a crashed match still leaves its rounds behind
+
+        bot.handle_new_round, bot.get_actions, bot.handle_round_over = logged_new_round, logged_get_actions, logged_round_over
+
+    @staticmethod
+    def pack_decision(actions, equities, seconds):
+        action_fields = []
+        for action in actions:
+            action_fields += _pack_action(action)
+        equities = [float('nan') if equity is None else equity for equity in equities]
+        return DECISION.pack(*equities, *action_fields, seconds)
+
+    def write(self, kind, game_state, active, body):
+        self.fp.write(PREFIX.pack(kind, game_state.round_num, game_state.bankroll, game_state.opp_bankroll, game_state.game_clock, active) + body)
+
+    def close(self):
+        self.fp.close()
+
+
+def read_log(path):
+    '''
+    Reads a log back.
+    Returns:
+    the match seed and a list of records, dicts with the callback 'kind', its
+    'game_state', 'active' and 'round_state' (or 'terminal_state'), plus the
+    logged 'actions', 'equities' and 'seconds' for get_actions records
+    '''
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    magic, seed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('not a decision log: ' + path)
+    offset = HEADER.size
+    records = []
+    while offset < len(data):
+        kind, round_num, bankroll, opp_bankroll, game_clock, active = PREFIX.unpack_from(data, offset)
+        offset += PREFIX.size
+        record = {'kind': kind, 'game_state': GameState(bankroll, opp_bankroll, game_clock, round_num), 'active': active}
+        if kind == ROUND_OVER:
+            deltas = list(DELTAS.unpack_from(data, offset))
+            offset += DELTAS.size
+            previous_state, offset = _unpack_round(data, offset)
+            record['terminal_state'] = TerminalState(deltas, previous_state)
+        else:
+            record['round_state'], offset = _unpack_round(data, offset)
+        if kind == ACTIONS:
+            fields = DECISION.unpack_from(data, offset)
+            offset += DECISION.size
+            record['equities'] = [None if equity != equity else equity for equity in fields[:NUM_BOARDS]]
+            record['actions'] = [_unpack_action(*fields[NUM_BOARDS + 4 * i: NUM_BOARDS + 4 * i + 4]) for i in range(NUM_BOARDS)]
+            record['seconds'] = fields[-1]
+        records.append(record)
+    return seed, records
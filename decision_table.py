@@ -0,0 +1,54 @@
+'''
+Precomputed pieces of the betting formulas in get_actions, so the per-board
+loop does lookups instead of exponentials and sums of model terms.
+'''
+import math
+
+INTIMIDATION = {'Raise': .2, 'Call': .07, 'Check': 0} #strength we give up to the opp's last action before round 30
+PRIOR_RAISE_RATE = .2 #assumed opp preflop raise rate until the model has one
+TABLE_BETS = 8 #earlier opp bets on a board the strength offsets are tabulated for
+
+
+class DecisionTable():
+    '''
+    The terms of the betting formulas that only depend on the opponent model:
+    the preflop raise penalties, the aggression per earlier opp bet on a board,
+    the exponent of the bet model and the strength offsets the early game
+    postflop play subtracts before comparing with the pot odds. The Player
+    rebuilds them right after each change to the model they come from (an opp
+    post flop action, an opp small blind raise, the end of a round), and
+    get_actions only reads them.
+    '''
+    __slots__ = ('bb_penalty', 'sb_penalty', 'aggression', 'bet_exponent', 'offsets')
+
+    def update(self, opponent, intimidation=INTIMIDATION):
+        '''
+        Rebuilds every term from the model's current values.
+        Arguments:
+        opponent: the OpponentModel
+        intimidation: the strength given up to each opp last action, player.py's INTIMIDATION
+        '''
+        self.update_preflop(opponent)
+        raise_rate = opponent.raise_rate
+        self.aggression = .5 * math.exp(-10 * raise_rate) #per earlier opp bet on the board
+        self.bet_exponent = 2 + (raise_rate - .25)
+        self.offsets = {action: [offset + bets * self.aggression for bets in range(TABLE_BETS)] for action, offset in intimidation.items()}
+
+    def update_preflop(self, opponent):
+        '''
+        Rebuilds only the preflop raise penalties, all an opp preflop raise changes.
+        '''
+        bb_raise_rate = opponent.bb_raise_rate
+        sb_raise_count = opponent.sb_raise_count
+        self.bb_penalty = 2 * (bb_raise_rate if bb_raise_rate is not None else PRIOR_RAISE_RATE) ** 2
+        self.sb_penalty = 2 * (sb_raise_count if sb_raise_count is not None else PRIOR_RAISE_RATE) ** 2 #the count, not the rate, as the big blind play has always used
+
+    def strength_offset(self, opp_last_action, previous_bets):
+        '''
+        What the early game postflop play takes off our strength: the opp's
+        last action and 'previous_bets' earlier opp bets on the board.
+        '''
+        offsets = self.offsets[opp_last_action]
+        if previous_bets < TABLE_BETS:
+            return offsets[previous_bets]
+        return offsets[0] + previous_bets * self.aggression
@@ -0,0 +1,460 @@
+'''
+Equity estimation for a pair of hole cards against a random opponent hand
+or a weighted opponent range.
+'''
+import collections
+import functools
+import itertools
+import math
+import time
+import numpy as np
+import fast_eval
+from cards import parse_cards, card_mask, canonical_situation
+from equity_cache import EQUITY_CACHE
+from opp_range import COMBOS, NUM_COMBOS
+
+EXACT_MAX_COMBOS = 50000 #enumerate exactly when there are at most this many (run-out, opponent hand) combinations
+ANYTIME_CHUNK = 250 #samples per board between confidence checks
+ANYTIME_MAX_ITERS = 20000
+ANYTIME_HALF_WIDTH = .01 #stop sampling a board once its 95% confidence interval is this tight
+OPP_HANDS_PER_RUNOUT = 4 #opponent hands scored against each sampled run-out, our hand is only evaluated once for all of them
+REPLICATE_RUNOUTS = 16 #run-outs per stratified design
+REPLICATE_SAMPLES = OPP_HANDS_PER_RUNOUT * REPLICATE_RUNOUTS #samples (scored opp hands) per replicate
+MIN_REPLICATES = 8 #replicates before a board's standard error is trusted to stop sampling it
+ALL_CARDS = np.arange(52, dtype=np.int32)
+
+#a situation parsed once into int32 arrays, so repeated sampling of it does no card parsing or deck building
+PreparedSituation = collections.namedtuple('PreparedSituation', ['hole', 'board', 'deck', 'opp_range'])
+
+
+def monte_carlo_strength(hole, iters, board_cards, dead_cards, rng=None):
+    '''
+    A Monte Carlo method meant to estimate the win probability of a pair of
+    hole cards. Simlulates 'iters' games and determines the win rates of our cards
+    Arguments:
+    hole: a list of our two hole cards
+    iters: a integer that determines how many Monte Carlo samples to take
+    board_cards: the board cards dealt so far ('' for cards not yet dealt)
+    dead_cards: cards that can't come up in the simulation (our other hole cards)
+    rng: an optional random.Random to shuffle with, for reproducible results
+    Returns:
+    our win probability, counting ties as half a win
+    '''
+    import eval7 #only the offline table builder still samples with eval7, the bot doesn't need to load it
+    deck = eval7.Deck() #eval7 object!
+    hole_cards = [eval7.Card(card) for card in hole] #card objects, used to evaliate hands
+    board_cards = [eval7.Card(card) for card in board_cards if card != '']
+    dead_cards = [eval7.Card(card) for card in dead_cards]
+
+    for card in hole_cards: #remove cards that we know about! they shouldn't come up in simulations
+        deck.cards.remove(card)
+    for card in board_cards:
+        deck.cards.remove(card)
+    for card in dead_cards:
+        deck.cards.remove(card)
+
+    score = 0
+    _COMM = 5 - len(board_cards) #the number of cards we need to draw
+    _OPP = 2
+    for _ in range(iters): #take 'iters' samples
+        if rng is not None:
+            rng.shuffle(deck.cards)
+        else:
+            deck.shuffle() #make sure our samples are random
+
+        draw = deck.peek(_COMM + _OPP)
+
+        opp_hole = draw[: _OPP]
+        community = draw[_OPP: ]
+        community = community + board_cards
+
+        our_hand = hole_cards + community #the two showdown hands
+        opp_hand = opp_hole + community
+
+        our_hand_value = eval7.evaluate(our_hand) #the ranks of our hands (only useful for comparisons)
+        opp_hand_value = eval7.evaluate(opp_hand)
+
+        if our_hand_value > opp_hand_value: #we win!
+            score += 2
+
+        elif our_hand_value == opp_hand_value: #we tie.
+            score += 1
+
+    hand_strength = score / (2 * iters) #this is our win probability!
+
+    return hand_strength
+
+
+def showdown_strength(hole, board_cards, opp_known_cards):
+    '''
+    Scores a finished board where the opponent's cards were revealed.
+    Returns:
+    1 if we won, 0 if we lost and .5 on a tie
+    '''
+    board = parse_cards(board_cards)
+    our_hand_value, opp_hand_value = fast_eval.evaluate([parse_cards(hole) + board, parse_cards(opp_known_cards) + board])
+    if our_hand_value > opp_hand_value:
+        return 1
+    elif our_hand_value < opp_hand_value:
+        return 0
+    else:
+        return .5
+
+
+def deal_runouts(deck, num_cards, iters, rng):
+    '''
+    Draws 'iters' random sets of 'num_cards' distinct cards from 'deck' at once,
+    with a partial Fisher-Yates shuffle run on every row in parallel.
+    Arguments:
+    deck: an integer array of the cards that can still come up
+    Returns:
+    an (iters, num_cards) integer array
+    '''
+    return _shuffle_front(np.tile(deck, (iters, 1)), num_cards, len(deck), rng)
+
+
+def _shuffle_front(decks, num_cards, size, rng, uniforms=None):
+    '''
+    Moves a random choice of 'num_cards' of the first 'size' cards of every
+    row to the front, in random order, and returns them.
+    Arguments:
+    uniforms: optional (rows, num_cards) numbers in [0, 1) to drive the swaps
+    with instead of fresh random ones, e.g. from stratified_uniforms
+    '''
+    rows = np.arange(len(decks))
+    for j in range(num_cards):
+        if uniforms is None:
+            swap = rng.integers(j, size, size=len(decks))
+        else:
+            swap = j + (uniforms[:, j] * (size - j)).astype(np.int64)
+        picked = decks[rows, swap]
+        decks[rows, swap] = decks[:, j]
+        decks[:, j] = picked
+    return decks[:, :num_cards]
+
+
+def deal_against_range(deck, opp_range, num_cards, iters, rng):
+    '''
+    Like deal_runouts for an opponent hand plus 'num_cards' board cards, but the
+    opponent hands are drawn from 'opp_range' instead of uniformly. Each row's
+    opponent cards are moved to the back of its deck and the board is dealt
+    from what is left, so no sample is wasted on collisions.
+    Arguments:
+    deck: an integer array of the cards that can still come up
+    opp_range: 1326 weights over opp_range.COMBOS
+    Returns:
+    an (iters, 2 + num_cards) integer array, the opponent's hand first
+    '''
+    live = np.zeros(52, dtype=bool)
+    live[deck] = True
+    weights = np.where(live[COMBOS].all(axis=1), opp_range, 0.)
+    opp = COMBOS[rng.choice(NUM_COMBOS, size=iters, p=weights / weights.sum())]
+
+    size = len(deck)
+    position = np.zeros(52, dtype=np.int64)
+    position[deck] = np.arange(size)
+    decks = np.tile(deck, (iters, 1))
+    rows = np.arange(iters)
+    first = position[opp[:, 0]]
+    decks[rows, first] = decks[:, size - 1]
+    decks[:, size - 1] = opp[:, 0]
+    second = position[opp[:, 1]]
+    second = np.where(second == size - 1, first, second) #it was swapped into the first card's place
+    decks[rows, second] = decks[:, size - 2]
+    decks[:, size - 2] = opp[:, 1]
+    return np.concatenate([opp, _shuffle_front(decks, num_cards, size - 2, rng)], axis=1)
+
+
+def deck_from_mask(mask):
+    '''
+    The cards not in a card_mask, as an int32 array.
+    '''
+    return ALL_CARDS[((np.int64(mask) >> ALL_CARDS) & 1) == 0]
+
+
+def prepare_situation(situation):
+    '''
+    Parses a (hole, board_cards, dead_cards[, opp_range]) situation into a
+    PreparedSituation. Prepared situations are returned as they are.
+    '''
+    if isinstance(situation, PreparedSituation):
+        return situation
+    hole = parse_cards(situation[0])
+    board = parse_cards(situation[1])
+    deck = deck_from_mask(card_mask(hole + board + parse_cards(situation[2])))
+    opp_range = situation[3] if len(situation) > 3 else None
+    return PreparedSituation(np.array(hole, dtype=np.int32), np.array(board, dtype=np.int32), deck, opp_range)
+
+
+def stratified_uniforms(designs, rows, dims, rng):
+    '''
+    Latin hypercube samples: 'designs' independent (rows, dims) designs in
+    which every column has exactly one value in each of the 'rows' equal
+    slices of [0, 1). Fed into a Fisher-Yates deal, each position's card is
+    spread evenly over the deck instead of clumping like independent draws.
+    Returns:
+    a (designs * rows, dims) array, the designs one after another
+    '''
+    strata = np.argsort(rng.random((designs, rows, dims)), axis=1)
+    return ((strata + rng.random((designs, rows, dims))) / rows).reshape(designs * rows, dims)
+
+
+def _replicate_means(situations, replicates, rng):
+    '''
+    Scores 'replicates' independent replicates of every situation and returns
+    their mean scores (1 win, .5 tie, 0 loss) as a (len(situations), replicates)
+    array. Being independent, the spread of the replicate means gives an honest
+    standard error, however correlated the samples inside a replicate are.
+
+    Against a random opponent a replicate is one stratified design of
+    REPLICATE_RUNOUTS run-outs, each played against OPP_HANDS_PER_RUNOUT
+    opponent hands dealt from the rest of the deck, so our hand is evaluated
+    once per four samples. All such situations on the same street share the
+    same designs (common random numbers), which keeps the comparison between
+    boards from being swamped by sampling noise. Situations with an opponent
+    range get REPLICATE_SAMPLES independent samples per replicate from
+    deal_against_range. Every hand is scored by a single evaluator call.
+    '''
+    situations = [prepare_situation(situation) for situation in situations]
+    runouts = replicates * REPLICATE_RUNOUTS
+    samples = replicates * REPLICATE_SAMPLES
+    rows = [runouts * (1 + OPP_HANDS_PER_RUNOUT) if situation.opp_range is None else 2 * samples for situation in situations]
+    hands = np.empty((sum(rows), 7), dtype=np.int32)
+    uniforms = {} #cards to deal -> the designs shared by every situation dealing that many
+    offset = 0
+    for situation, size in zip(situations, rows):
+        hole, board, deck, opp_range = situation
+        num_runout = 5 - len(board)
+        block = hands[offset: offset + size]
+        offset += size
+        if opp_range is not None:
+            draw = deal_against_range(deck, opp_range, num_runout, samples, rng)
+            block[:samples, :2] = hole
+            block[samples:, :2] = draw[:, :2]
+            block[:samples, 2: 2 + len(board)] = board
+            block[samples:, 2: 2 + len(board)] = board
+            block[:samples, 2 + len(board):] = draw[:, 2:]
+            block[samples:, 2 + len(board):] = draw[:, 2:]
+            continue
+        num_cards = num_runout + 2 * OPP_HANDS_PER_RUNOUT
+        if num_cards not in uniforms:
+            uniforms[num_cards] = stratified_uniforms(replicates, REPLICATE_RUNOUTS, num_cards, rng)
+        draw = _shuffle_front(np.tile(deck, (runouts, 1)), num_cards, len(deck), rng, uniforms[num_cards]) #the run-out, then the opp hands
+        ours = block[:runouts]
+        opps = block[runouts:].reshape(runouts, OPP_HANDS_PER_RUNOUT, 7)
+        ours[:, :2] = hole
+        ours[:, 2: 2 + len(board)] = board
+        ours[:, 2 + len(board):] = draw[:, :num_runout]
+        opps[:, :, :2] = draw[:, num_runout:].reshape(runouts, OPP_HANDS_PER_RUNOUT, 2)
+        opps[:, :, 2:] = ours[:, None, 2:]
+
+    values = fast_eval.evaluate(hands)
+    means = np.empty((len(situations), replicates))
+    offset = 0
+    for i, (situation, size) in enumerate(zip(situations, rows)):
+        block = values[offset: offset + size]
+        offset += size
+        if situation.opp_range is not None:
+            our_values, opp_values = block[:samples], block[samples:]
+        else:
+            our_values = np.repeat(block[:runouts], OPP_HANDS_PER_RUNOUT)
+            opp_values = block[runouts:]
+        score = (our_values > opp_values) + .5 * (our_values == opp_values)
+        means[i] = score.reshape(replicates, -1).mean(axis=1)
+    return means
+
+
+def _replicates(iters):
+    return max(1, -(-iters // REPLICATE_SAMPLES))
+
+
+def sample_count(iters):
+    '''
+    How many samples batch_strength and sample_sums actually take per board
+    when asked for 'iters', a whole number of replicates.
+    '''
+    return _replicates(iters) * REPLICATE_SAMPLES
+
+
+def batch_strength(situations, iters, rng):
+    '''
+    The vectorized counterpart of monte_carlo_strength: estimates the win
+    probability for several boards at once, from at least 'iters' samples
+    each, all scored by a single call to the vectorized evaluator (see
+    _replicate_means for how the samples are drawn).
+    Arguments:
+    situations: a list of (hole, board_cards, dead_cards) tuples, one per board,
+    optionally with an opp range as a fourth element
+    iters: how many Monte Carlo samples to take per board
+    rng: a numpy Generator
+    Returns:
+    a list with our win probability on each board, counting ties as half a win
+    '''
+    means = _replicate_means(situations, _replicates(iters), rng)
+    return [float(mean) for mean in means.mean(axis=1)]
+
+
+def sample_sums(situations, iters, rng):
+    '''
+    Takes at least 'iters' samples per situation and returns the per-situation
+    sums of the replicate means and of their squares, and the number of
+    replicates, which is all anytime_estimates needs to merge batches and
+    track the standard error.
+    '''
+    means = _replicate_means(situations, _replicates(iters), rng)
+    return means.sum(axis=1), (means ** 2).sum(axis=1), means.shape[1]
+
+
+def anytime_estimates(situations, rng, time_budget, min_iters=ANYTIME_CHUNK, max_iters=ANYTIME_MAX_ITERS, half_width=ANYTIME_HALF_WIDTH):
+    '''
+    An anytime version of batch_strength. Samples are taken in chunks and a
+    board stops being sampled once the 95% confidence interval of its
+    estimate is within 'half_width' (after MIN_REPLICATES replicates), once
+    it has 'max_iters' samples, or for every board once 'time_budget'
+    seconds are spent (after the first 'min_iters' samples, which are always
+    taken).
+    Arguments:
+    situations: a list of (hole, board_cards, dead_cards) tuples, one per board
+    rng: a numpy Generator
+    time_budget: how many seconds we may spend
+    Returns:
+    our win probability on each board and its standard error, and the total number of samples taken
+    '''
+    start = time.perf_counter()
+    situations = [prepare_situation(situation) for situation in situations] #parsed once for all the chunks
+    totals = np.zeros(len(situations)) #sums of replicate means
+    squares = np.zeros(len(situations))
+    counts = np.zeros(len(situations), dtype=np.int64) #replicates
+    active = list(range(len(situations)))
+    chunk = min_iters
+    while active:
+        batch = [situations[i] for i in active]
+        batch_totals, batch_squares, taken = sample_sums(batch, chunk, rng)
+        totals[active] += batch_totals
+        squares[active] += batch_squares
+        counts[active] += taken
+
+        errors = _standard_errors(totals, squares, counts)
+        converged = (1.96 * errors <= half_width) & (counts >= MIN_REPLICATES)
+        active = [i for i in active if not converged[i] and counts[i] * REPLICATE_SAMPLES < max_iters]
+        if time.perf_counter() - start >= time_budget:
+            break
+        chunk = ANYTIME_CHUNK
+    means = totals / counts
+    return ([float(mean) for mean in means], [float(error) for error in _standard_errors(totals, squares, counts)]), int(counts.sum()) * REPLICATE_SAMPLES
+
+
+def _standard_errors(totals, squares, counts):
+    means = totals / counts
+    variances = np.maximum(squares - counts * means ** 2, 0) / np.maximum(counts - 1, 1) #of a replicate mean
+    return np.sqrt(variances / counts)
+
+
+def anytime_strength(situations, rng, time_budget, min_iters=ANYTIME_CHUNK, max_iters=ANYTIME_MAX_ITERS, half_width=ANYTIME_HALF_WIDTH):
+    '''
+    anytime_estimates without the standard errors.
+    Returns:
+    a list with our win probability on each board, and the total number of samples taken
+    '''
+    (strengths, errors), samples = anytime_estimates(situations, rng, time_budget, min_iters, max_iters, half_width)
+    return strengths, samples
+
+
+def exact_range_strength(hole, board_cards, dead_cards, opp_range):
+    '''
+    Our exact win probability on a complete board against an opponent range:
+    every opponent hand that can still be dealt is scored and weighted.
+    Arguments:
+    board_cards: all five board cards
+    opp_range: 1326 weights over opp_range.COMBOS
+    '''
+    hole = parse_cards(hole)
+    board = parse_cards(board_cards)
+    live = np.ones(52, dtype=bool)
+    live[hole + board + parse_cards(dead_cards)] = False
+    possible = live[COMBOS].all(axis=1)
+    opp = COMBOS[possible]
+    weights = opp_range[possible]
+    our_value = fast_eval.evaluate([hole + board])[0]
+    opp_values = fast_eval.evaluate(np.concatenate([opp, np.tile(np.array(board, dtype=np.int32), (len(opp), 1))], axis=1))
+    score = (our_value > opp_values) + .5 * (our_value == opp_values)
+    return float((score * weights).sum() / weights.sum())
+
+
+def enumeration_size(hole, board_cards, dead_cards):
+    '''
+    Counts the (run-out, opponent hand) combinations exact_strength would have
+    to score for a situation.
+    '''
+    num_board = len(parse_cards(board_cards))
+    num_deck = 52 - len(hole) - num_board - len(dead_cards)
+    return math.comb(num_deck - (5 - num_board), 2) * math.comb(num_deck, 5 - num_board)
+
+
+def exact_strength(hole, board_cards, dead_cards):
+    '''
+    Computes the exact win probability of our hole cards by enumerating every
+    remaining run-out and opponent hand. Only cheap on the turn and river, so
+    check enumeration_size against EXACT_MAX_COMBOS first. Results go through
+    the process-wide EQUITY_CACHE, keyed on the suit-canonical situation, so
+    asking again (or for a suit-isomorphic situation) is a dict lookup.
+    Arguments:
+    hole: a list of our two hole cards
+    board_cards: the board cards dealt so far ('' for cards not yet dealt)
+    dead_cards: cards that can't come up (our other hole cards)
+    Returns:
+    our win probability, counting ties as half a win
+    '''
+    key = canonical_situation(parse_cards(hole), parse_cards(board_cards), parse_cards(dead_cards))
+    strength = EQUITY_CACHE.get(key)
+    if strength is None:
+        strength = _exact_strength(*key)
+        EQUITY_CACHE.put(key, strength)
+    return strength
+
+
+def enumerate_strength(hole, board_cards, dead_cards):
+    '''
+    exact_strength without EQUITY_CACHE: always enumerates, whatever the
+    street, so it is also a reference for the samplers (a flop takes seconds,
+    preflop far too long).
+    '''
+    return _exact_strength(*canonical_situation(parse_cards(hole), parse_cards(board_cards), parse_cards(dead_cards)))
+
+
+@functools.lru_cache(maxsize=None)
+def _enumeration_indices(num_deck, num_runout):
+    '''
+    The index arrays for enumerating every run-out of 'num_runout' cards from a
+    'num_deck' card deck against every opponent hand that doesn't reuse one of
+    its cards. They only depend on the two sizes, so they are built once.
+    Returns:
+    the (R, num_runout) run-outs, and for every (run-out, opponent hand) pairing
+    its run-out row and the opponent's two deck indices
+    '''
+    runouts = list(itertools.combinations(range(num_deck), num_runout))
+    runouts = np.array(runouts, dtype=np.intp).reshape(len(runouts), num_runout) #(R, cards to come)
+    opp_holes = np.array(list(itertools.combinations(range(num_deck), 2)))
+    runout_index, opp_index = np.divmod(np.arange(len(runouts) * len(opp_holes)), len(opp_holes))
+    in_runout = np.zeros((len(runouts), num_deck), dtype=bool)
+    in_runout[np.arange(len(runouts))[:, None], runouts] = True
+    collides = in_runout[runout_index, opp_holes[opp_index, 0]] | in_runout[runout_index, opp_holes[opp_index, 1]]
+    return runouts, runout_index[~collides], opp_holes[opp_index[~collides]]
+
+
+def _exact_strength(hole, board, dead):
+    deck = deck_from_mask(card_mask(hole + board + dead))
+    runouts, runout_index, opp_holes = _enumeration_indices(len(deck), 5 - len(board))
+
+    hands = np.empty((len(runouts) + len(runout_index), 7), dtype=np.int32) #our hand on each run-out, then every opponent pairing
+    hands[:len(runouts), :2] = hole
+    hands[:len(runouts), 2: 2 + len(board)] = board
+    hands[:len(runouts), 2 + len(board):] = deck[runouts]
+    hands[len(runouts):, :2] = deck[opp_holes]
+    hands[len(runouts):, 2:] = hands[runout_index, 2:]
+    values = fast_eval.evaluate(hands)
+    our_values = values[runout_index]
+    opp_values = values[len(runouts):]
+
+    score = 2 * (our_values > opp_values) + (our_values == opp_values)
+    return float(score.sum()) / (2 * len(score))
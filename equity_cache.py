@@ -0,0 +1,84 @@
+'''
+Process-wide memo of equities we have already computed.
+'''
+import pickle
+import threading
+from collections import OrderedDict
+from cards import parse_cards, canonical_situation
+
+EQUITY_CACHE_SIZE = 50000 #entries, roughly 15MB
+
+
+class EquityCache():
+    '''
+    An LRU cache from a suit-canonical (hole, board, dead) situation to our
+    equity in it. Situations that only differ by suits share an entry, the
+    least recently used entries are evicted once the cache is full, and it
+    can be saved and reloaded so later matches start warm. Safe to use from
+    the background thread.
+    '''
+
+    def __init__(self, max_entries=EQUITY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(hole, board_cards, dead_cards):
+        '''
+        The cache key of a situation given as card strings or integers.
+        '''
+        return canonical_situation(parse_cards(hole), parse_cards(board_cards), parse_cards(dead_cards))
+
+    def get(self, key):
+        '''
+        Returns the cached equity for 'key', or None.
+        '''
+        with self.lock:
+            strength = self.entries.get(key)
+            if strength is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return strength
+
+    def put(self, key, strength):
+        with self.lock:
+            self.entries[key] = strength
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries), 'max_entries': self.max_entries}
+
+    def save(self, path):
+        with self.lock:
+            items = list(self.entries.items())
+        with open(path, 'wb') as fp:
+            pickle.dump(items, fp)
+
+    def load(self, path):
+        '''
+        Adds the entries saved at 'path', oldest first, so the most recently
+        used ones survive if they don't all fit.
+        '''
+        with open(path, 'rb') as fp:
+            items = pickle.load(fp)
+        for key, strength in items:
+            self.put(key, strength)
+
+
+EQUITY_CACHE = EquityCache() #shared by everything in the process
@@ -0,0 +1,164 @@
+'''
+Precomputed equity lookup table for flop decisions.
+
+Situations are reduced to their suit-isomorphic representative (see
+cards.canonical_cards) and stored as a sorted array of packed uint64 keys
+next to a uint16 array of equities. A lookup is one canonicalization plus a
+binary search, so it costs microseconds instead of a Monte Carlo run. The
+turn and river are always cheap enough to enumerate exactly, so the table
+only holds flops.
+
+The equities have two sources of error:
+- they are against a uniformly random opponent hand with no dead cards,
+  while in play our other four cards are dead. On the flop that is off by
+  about .012 on average (.024 at worst, against exact equities on the
+  bench_equity.py corpus)
+- they are sampled with batch_strength, a standard error of about .0046 at
+  the default 10000 samples (.0093 at 2000). Exact enumeration would remove
+  it, but takes about .5s per flop, some 190 core-hours for the table.
+Together that is roughly twice the standard error the anytime sampler stops
+at, which is the price of skipping it.
+
+File layout (little endian):
+    b'EQT2'
+    uint32          number of entries
+    uint64 keys (sorted), then uint16 equities (equity * 65535)
+
+The table isn't shipped (about 13MB for the ~1.3M canonical flops); without
+it the bot samples the flop. Build it offline next to player.py with e.g.
+    python equity_table.py --out equity_table.bin --workers 8
+which takes about 6ms per flop, a little over two core-hours.
+'''
+import argparse
+import itertools
+import multiprocessing
+import struct
+import numpy as np
+from cards import canonical_cards, pack_cards, parse_cards
+from equity import batch_strength
+
+TABLE_MAGIC = b'EQT2'
+TABLE_STREET = 3
+EQUITY_SCALE = 65535
+BUILD_ITERS = 10000
+BUILD_CHUNK = 256 #flops per job
+
+
+def situation_key(hole, board):
+    '''
+    Packs the canonical form of a (hole, board) situation given as integer cards.
+    '''
+    canon_hole, canon_board = canonical_cards(hole, board)
+    return pack_cards(canon_hole + canon_board)
+
+
+class EquityTable():
+    '''
+    Read-only view of an equity table file. The arrays are memory-mapped so
+    loading is instant and only the pages touched by lookups are read.
+    '''
+
+    def __init__(self, keys, equities):
+        self.keys = keys
+        self.equities = equities
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as fp:
+            header = fp.read(8)
+        if header[:4] != TABLE_MAGIC:
+            raise ValueError('not an equity table (or one from before the flop only layout, rebuild it): ' + path)
+        count, = struct.unpack('<I', header[4:])
+        if count == 0:
+            return cls(np.zeros(0, dtype='<u8'), np.zeros(0, dtype='<u2'))
+        keys = np.memmap(path, dtype='<u8', mode='r', offset=len(header), shape=(count,))
+        equities = np.memmap(path, dtype='<u2', mode='r', offset=len(header) + 8 * count, shape=(count,))
+        return cls(keys, equities)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, hole, board_cards):
+        '''
+        Finds the equity of our hole cards on a flop.
+        Arguments:
+        hole: a list of our two hole cards
+        board_cards: the board cards dealt so far ('' for cards not yet dealt)
+        Returns:
+        our win probability, or None if the situation is not in the table
+        '''
+        board = parse_cards(board_cards)
+        if len(board) != TABLE_STREET:
+            return None
+        key = np.uint64(situation_key(parse_cards(hole), board))
+        index = int(np.searchsorted(self.keys, key))
+        if index < len(self.keys) and self.keys[index] == key:
+            return int(self.equities[index]) / EQUITY_SCALE
+        return None
+
+
+def write_equity_table(path, entries):
+    '''
+    Writes an equity table file.
+    Arguments:
+    path: where to write the file
+    entries: a dict of {packed key: equity}
+    '''
+    keys = np.array(sorted(entries), dtype='<u8')
+    equities = np.array([round(entries[int(key)] * EQUITY_SCALE) for key in keys], dtype='<u2')
+    with open(path, 'wb') as fp:
+        fp.write(TABLE_MAGIC)
+        fp.write(struct.pack('<I', len(keys)))
+        fp.write(keys.tobytes())
+        fp.write(equities.tobytes())
+
+
+def canonical_flops():
+    '''
+    Yields every canonical hole + flop situation exactly once, as a pair of
+    integer card tuples.
+    '''
+    for hole in itertools.combinations(range(52), 2):
+        if canonical_cards(hole, ())[0] != hole: #only the 169 canonical starting hands
+            continue
+        seen = set()
+        deck = [card for card in range(52) if card not in hole]
+        for flop in itertools.combinations(deck, 3):
+            situation = canonical_cards(hole, flop)
+            if situation not in seen:
+                seen.add(situation)
+                yield situation
+
+
+def _chunk_equities(job):
+    index, situations, iters, seed = job
+    rng = np.random.default_rng([seed, index]) #per chunk, so the table doesn't depend on how the chunks were spread over workers
+    equities = batch_strength([(list(hole), list(board), []) for hole, board in situations], iters, rng)
+    return [(pack_cards(hole + board), equity) for (hole, board), equity in zip(situations, equities)]
+
+
+def build_equity_table(path, iters=BUILD_ITERS, workers=None, seed=0):
+    '''
+    Builds the flop equity table offline and writes it to 'path'.
+    Arguments:
+    iters: Monte Carlo samples per situation
+    workers: number of processes to use (defaults to all cores)
+    '''
+    flops = canonical_flops()
+    chunks = iter(lambda: list(itertools.islice(flops, BUILD_CHUNK)), [])
+    entries = {}
+    with multiprocessing.Pool(workers) as pool:
+        for results in pool.imap_unordered(_chunk_equities, ((index, chunk, iters, seed) for index, chunk in enumerate(chunks))):
+            entries.update(results)
+    print('flop:', len(entries), 'situations')
+    write_equity_table(path, entries)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the flop equity lookup table.')
+    parser.add_argument('--out', default='equity_table.bin')
+    parser.add_argument('--iters', type=int, default=BUILD_ITERS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    build_equity_table(args.out, args.iters, args.workers, args.seed)
@@ -0,0 +1,131 @@
+'''
+Vectorized 7-card hand evaluator. Cards are integers 0..51 (rank * 4 + suit,
+see cards.py) and a whole (N, 7) array of hands is scored in a handful of
+numpy operations, so Monte Carlo samples no longer pay for a Python loop and
+two eval7 calls each.
+
+Scores are only meant for comparison (bigger is better), like eval7's. They
+are built as category << 26 | primary << 13 | secondary where primary and
+secondary are 13 bit rank masks (or a straight's high rank), so comparing the
+integers compares hand category first and kickers after. All the bit tricks
+go through 8192 entry lookup tables indexed by rank masks.
+
+Cards shared by every hand in a batch (a board, or a board and our hole
+cards) can be folded in once as a PartialHand, so only the cards that differ
+between hands are looked at per hand.
+'''
+import collections
+import numpy as np
+
+NUM_MASKS = 1 << 13
+POW2 = 1 << np.arange(13, dtype=np.int32)
+
+
+def _build_tables():
+    masks = np.arange(NUM_MASKS, dtype=np.int32)
+    bits = (masks[:, None] >> np.arange(13)) & 1 #(8192, 13) the ranks present in each mask
+    popcount = bits.sum(axis=1).astype(np.int32)
+
+    straight_high = np.full(NUM_MASKS, -1, dtype=np.int32)
+    straights = [(3, 0b1000000001111)] #the wheel, A2345, lowest first so better straights overwrite it
+    straights += [(high, int(POW2[high - 4: high + 1].sum())) for high in range(4, 13)]
+    for high, straight_mask in straights:
+        straight_high[(masks & straight_mask) == straight_mask] = high
+
+    keep = {}
+    from_top = np.cumsum(bits[:, ::-1], axis=1)[:, ::-1] #how many ranks at or above each rank are present
+    for k in (1, 2, 3, 5):
+        keep[k] = (bits * (from_top <= k)) @ POW2
+    return popcount, straight_high, keep
+
+
+POPCOUNT, STRAIGHT_HIGH, _KEEP = _build_tables()
+KEEP1, KEEP2, KEEP3, KEEP5 = _KEEP[1], _KEEP[2], _KEEP[3], _KEEP[5]
+
+SUIT_SHIFT = 13 #the ranks held in each suit are packed into one int64, 13 bits per suit
+
+#the evaluator's accumulators for some cards: the ranks seen at least 1..4 times, and the packed suit masks
+PartialHand = collections.namedtuple('PartialHand', ['seen1', 'seen2', 'seen3', 'seen4', 'suits', 'num_cards'])
+EMPTY_HAND = PartialHand(0, 0, 0, 0, 0, 0)
+
+
+def add_cards(partial, cards):
+    '''
+    Folds integer cards into a PartialHand.
+    Returns:
+    a new PartialHand
+    '''
+    seen1, seen2, seen3, seen4, suits, num_cards = partial
+    for card in cards:
+        bit = 1 << (int(card) >> 2)
+        seen4 |= seen3 & bit
+        seen3 |= seen2 & bit
+        seen2 |= seen1 & bit
+        seen1 |= bit
+        suits |= bit << (SUIT_SHIFT * (int(card) & 3))
+    return PartialHand(seen1, seen2, seen3, seen4, suits, num_cards + len(cards))
+
+
+def evaluate(hands, partial=EMPTY_HAND):
+    '''
+    Scores a batch of 7-card hands.
+    Arguments:
+    hands: an (N, 7 - partial.num_cards) integer array of cards
+    partial: a PartialHand of cards every hand also holds
+    Returns:
+    an (N,) int32 array of hand values, bigger beats smaller
+    '''
+    hands = np.asarray(hands, dtype=np.int32).T.copy() #one contiguous row per card position
+    rank_bits = 1 << (hands >> 2)
+    suit_bits = rank_bits.astype(np.int64) << (SUIT_SHIFT * (hands & 3))
+
+    #seen_k holds the ranks we have seen at least k times, built one card at a time
+    seen1 = np.full(hands.shape[1], partial.seen1, dtype=np.int32)
+    seen2 = np.full_like(seen1, partial.seen2)
+    seen3 = np.full_like(seen1, partial.seen3)
+    seen4 = np.full_like(seen1, partial.seen4)
+    suits = np.full(hands.shape[1], partial.suits, dtype=np.int64) #no fancy indexed scatter per card, one shifted OR
+    for bit, suit_bit in zip(rank_bits, suit_bits):
+        seen4 |= seen3 & bit
+        seen3 |= seen2 & bit
+        seen2 |= seen1 & bit
+        seen1 |= bit
+        suits |= suit_bit
+    m4 = seen4 #ranks appearing exactly four, three, two and one times
+    m3 = seen3 & ~seen4
+    m2 = seen2 & ~seen3
+    m1 = seen1 & ~seen2
+    rank_mask = seen1
+
+    flush_mask = np.zeros_like(seen1)
+    for suit in range(4): #at most one suit can have 5 of 7 cards
+        suit_mask = ((suits >> (SUIT_SHIFT * suit)) & (NUM_MASKS - 1)).astype(np.int32)
+        flush_mask = np.where(POPCOUNT[suit_mask] >= 5, suit_mask, flush_mask)
+
+    straight_flush_high = STRAIGHT_HIGH[flush_mask]
+    straight_high = STRAIGHT_HIGH[rank_mask]
+    trips_top = KEEP1[m3]
+    full_house_pair = KEEP1[(m3 & ~trips_top) | m2]
+    two_pair_top = KEEP2[m2]
+
+    conditions = [
+        straight_flush_high >= 0,
+        m4 != 0,
+        (m3 != 0) & (full_house_pair != 0),
+        flush_mask != 0,
+        straight_high >= 0,
+        m3 != 0,
+        POPCOUNT[m2] >= 2,
+        m2 != 0,
+    ]
+    choices = [
+        (8 << 26) | (straight_flush_high << 13),
+        (7 << 26) | (m4 << 13) | KEEP1[rank_mask & ~m4],
+        (6 << 26) | (trips_top << 13) | full_house_pair,
+        (5 << 26) | (KEEP5[flush_mask] << 13),
+        (4 << 26) | (straight_high << 13),
+        (3 << 26) | (m3 << 13) | KEEP2[m1],
+        (2 << 26) | (two_pair_top << 13) | KEEP1[rank_mask & ~two_pair_top],
+        (1 << 26) | (m2 << 13) | KEEP3[m1],
+    ]
+    return np.select(conditions, choices, default=KEEP5[m1]).astype(np.int32)
@@ -0,0 +1,192 @@
+'''
+Reads the engine's game logs (gamelog.txt, one per match) into a columnar
+store: numpy arrays with one row per round and one row per logged action,
+saved together as an .npz so a pile of match history loads in one go.
+
+The lines we read (anything else is skipped):
+    Round #12, A (-34), B (34)
+    A posts the blind of 1 on board 1
+    A dealt [Ah Kd 7c 7s 2h 9d]
+    A assigns [Ah Kd] to board 1
+    Flop [2c 8h Td] on board 1
+    A bets 4 on board 1 / B raises to 12 on board 1
+    A calls on board 1 / A checks on board 1 / A folds on board 1
+    B shows [Qs Qh] on board 1
+    B awarded 12 on board 1 / B awarded 20
+
+Consecutive action lines of one player are one get_actions call (a triplet
+of actions), so the store keeps a call index per action. Cards we never got
+to see are -1.
+'''
+import re
+import numpy as np
+from cards import card_to_int
+from skeleton.states import NUM_BOARDS, SMALL_BLIND
+
+FOLD, CALL, CHECK, RAISE, ASSIGN = range(5) #action kinds, in the order of decision_log.ACTION_TYPES
+STREETS = {'Flop': 3, 'Turn': 4, 'River': 5}
+UNKNOWN = -1
+
+ROUND_LINE = re.compile(r'^Round #(\d+), (.+) \((-?\d+)\), (.+) \((-?\d+)\)')
+BLIND_LINE = re.compile(r'^(.+) posts the blind of (\d+) on board (\d+)')
+DEALT_LINE = re.compile(r'^(.+) dealt \[([^\]]*)\]')
+ASSIGN_LINE = re.compile(r'^(.+) assigns \[([^\]]*)\] to board (\d+)')
+STREET_LINE = re.compile(r'^(Flop|Turn|River) \[([^\]]*)\],? on board (\d+)')
+ACTION_LINE = re.compile(r'^(.+) (folds|calls|checks|bets|raises to)(?: (\d+))? on board (\d+)')
+SHOW_LINE = re.compile(r'^(.+) shows \[([^\]]*)\] on board (\d+)')
+AWARD_LINE = re.compile(r'^(.+) awarded (-?\d+)$')
+ACTION_KINDS = {'folds': FOLD, 'calls': CALL, 'checks': CHECK, 'bets': RAISE, 'raises to': RAISE}
+
+
+def _cards(text):
+    return [card_to_int(card) for card in text.split()]
+
+
+class _Round():
+    '''
+    One round while it is being parsed, with everything indexed by player
+    (0 for the bot the log is read for, 1 for its opponent).
+    '''
+
+    def __init__(self, round_num, bankrolls):
+        self.round_num = round_num
+        self.bankrolls = bankrolls
+        self.seat = None #our seat, 0 on the small blind
+        self.hands = np.full((2, 6), UNKNOWN, dtype=np.int8)
+        self.holes = np.full((2, NUM_BOARDS, 2), UNKNOWN, dtype=np.int8)
+        self.boards = np.full((NUM_BOARDS, 5), UNKNOWN, dtype=np.int8)
+        self.shown = np.zeros(NUM_BOARDS, dtype=bool)
+        self.delta = 0
+
+
+def parse_game_log(path, name):
+    '''
+    Parses one game log from the point of view of the bot called 'name'.
+    Returns:
+    a dict of column arrays, see the module docstring and write_store
+    '''
+    rounds = []
+    actions = {'round': [], 'call': [], 'player': [], 'street': [], 'board': [], 'kind': [], 'amount': []}
+    current = None
+    street = 0
+    calls = 0
+    last_player = None
+    with open(path) as fp:
+        for line in fp:
+            line = line.strip()
+            match = ROUND_LINE.match(line)
+            if match:
+                names = [match.group(2), match.group(4)]
+                if name not in names:
+                    raise ValueError('%s: no bot called %s in round %s' % (path, name, match.group(1)))
+                bankrolls = [int(match.group(3)), int(match.group(5))]
+                if names[0] != name:
+                    bankrolls.reverse()
+                current = _Round(int(match.group(1)), bankrolls)
+                rounds.append(current)
+                street = 0
+                last_player = None
+                continue
+            if current is None:
+                continue
+            match = BLIND_LINE.match(line)
+            if match:
+                if int(match.group(2)) == SMALL_BLIND:
+                    current.seat = 0 if match.group(1) == name else 1
+                continue
+            match = DEALT_LINE.match(line)
+            if match:
+                cards = _cards(match.group(2))
+                current.hands[int(match.group(1) != name), :len(cards)] = cards
+                continue
+            match = STREET_LINE.match(line)
+            if match:
+                street = STREETS[match.group(1)]
+                cards = _cards(match.group(2))
+                current.boards[int(match.group(3)) - 1, :len(cards)] = cards
+                last_player = None #the first call of a street is a new call, even by the last one to act
+                continue
+            match = SHOW_LINE.match(line)
+            if match:
+                player = int(match.group(1) != name)
+                board = int(match.group(3)) - 1
+                current.holes[player, board] = _cards(match.group(2))
+                current.shown[board] = True
+                continue
+            match = AWARD_LINE.match(line)
+            if match:
+                current.delta = int(match.group(2)) if match.group(1) == name else -int(match.group(2))
+                continue
+            match = ASSIGN_LINE.match(line)
+            if match:
+                player, board, kind, amount = match.group(1) != name, int(match.group(3)) - 1, ASSIGN, 0
+                current.holes[int(player), board] = _cards(match.group(2))
+            else:
+                match = ACTION_LINE.match(line)
+                if match is None:
+                    continue
+                player, board, kind, amount = match.group(1) != name, int(match.group(4)) - 1, ACTION_KINDS[match.group(2)], int(match.group(3) or 0)
+            if player != last_player:
+                calls += 1
+                last_player = player
+            actions['round'].append(len(rounds) - 1)
+            actions['call'].append(calls - 1)
+            actions['player'].append(int(player))
+            actions['street'].append(street)
+            actions['board'].append(board)
+            actions['kind'].append(kind)
+            actions['amount'].append(amount)
+
+    for round_ in rounds:
+        if round_.seat is None: #no blind lines, the small blind assigns first
+            first = actions['round'].index(rounds.index(round_))
+            round_.seat = actions['player'][first]
+    columns = {
+        'round_num': np.array([round_.round_num for round_ in rounds], dtype=np.int32),
+        'bankrolls': np.array([round_.bankrolls for round_ in rounds], dtype=np.int32).reshape(-1, 2),
+        'seat': np.array([round_.seat for round_ in rounds], dtype=np.int8),
+        'hands': np.array([round_.hands for round_ in rounds], dtype=np.int8).reshape(-1, 2, 6),
+        'holes': np.array([round_.holes for round_ in rounds], dtype=np.int8).reshape(-1, 2, NUM_BOARDS, 2),
+        'boards': np.array([round_.boards for round_ in rounds], dtype=np.int8).reshape(-1, NUM_BOARDS, 5),
+        'shown': np.array([round_.shown for round_ in rounds], dtype=bool).reshape(-1, NUM_BOARDS),
+        'delta': np.array([round_.delta for round_ in rounds], dtype=np.int32),
+    }
+    for key, values in actions.items():
+        columns['action_' + key] = np.array(values, dtype=np.int32)
+    return columns
+
+
+def concat_stores(stores):
+    '''
+    Joins the columns of several logs into one store, renumbering the
+    round and call indices of the actions so they stay unique.
+    '''
+    columns = {}
+    rounds = calls = 0
+    for store in stores:
+        store = dict(store)
+        store['action_round'] = store['action_round'] + rounds
+        store['action_call'] = store['action_call'] + calls
+        rounds += len(store['round_num'])
+        calls += int(store['action_call'].max()) + 1 if len(store['action_call']) else 0
+        for key, values in store.items():
+            columns.setdefault(key, []).append(values)
+    return {key: np.concatenate(values) for key, values in columns.items()}
+
+
+def write_store(path, columns):
+    '''
+    Saves the columns as one compressed .npz. Per round: round_num,
+    bankrolls (ours, opp's) at the start, seat, hands and holes (cards
+    dealt and assigned per board, by player), boards, shown (boards that
+    went to showdown) and delta (our chips won). Per action: round (a row
+    of the round columns), call, player, street, board, kind and amount
+    (the raise to, for RAISE).
+    '''
+    with open(path, 'wb') as fp:
+        np.savez_compressed(fp, **columns)
+
+
+def load_store(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
@@ -0,0 +1,47 @@
+'''
+Opponent hand ranges: weights over the 1326 two card hands the opponent can
+hold, so equity can be computed against what they actually show up with
+instead of a uniformly random hand.
+'''
+import itertools
+import numpy as np
+
+COMBOS = np.array(list(itertools.combinations(range(52), 2)), dtype=np.int32) #(1326, 2) card ints, low card first
+NUM_COMBOS = len(COMBOS)
+COMBO_INDEX = np.full((52, 52), -1, dtype=np.int32) #card ints -> row of COMBOS, either order
+COMBO_INDEX[COMBOS[:, 0], COMBOS[:, 1]] = np.arange(NUM_COMBOS)
+COMBO_INDEX[COMBOS[:, 1], COMBOS[:, 0]] = np.arange(NUM_COMBOS)
+CARD_COMBOS = (COMBOS[None, :, :] == np.arange(52)[:, None, None]).any(axis=2) #(52, 1326) the combos holding each card
+
+RANGE_BINS = 10 #preflop strength buckets, each holding about a tenth of the hands
+RANGE_PRIOR_HANDS = 10. #pseudo-hands spread uniformly over the buckets, so a few showdowns don't make the range too narrow
+
+
+def uniform_range():
+    return np.ones(NUM_COMBOS)
+
+
+def combo_strengths(pair_strengths):
+    '''
+    The preflop strength of every combo, from the 52x52 strength matrix.
+    '''
+    return pair_strengths[COMBOS[:, 0], COMBOS[:, 1]]
+
+
+def range_weights(strengths, shown_strengths, prior_hands=RANGE_PRIOR_HANDS):
+    '''
+    Builds a range from the preflop strengths of hands the opponent has shown
+    down. The combos are bucketed by preflop strength and each bucket gets the
+    share of the range the shown hands fell into, smoothed towards uniform.
+    Arguments:
+    strengths: the preflop strength of every combo (see combo_strengths)
+    shown_strengths: preflop strengths of the hands the opp showed
+    Returns:
+    a 1326 weight vector, all ones when the opp looks like a random hand
+    '''
+    edges = np.quantile(strengths, np.linspace(0, 1, RANGE_BINS + 1)[1:-1])
+    combo_bins = np.searchsorted(edges, strengths, side='right')
+    bin_sizes = np.bincount(combo_bins, minlength=RANGE_BINS)
+    shown = np.bincount(np.searchsorted(edges, shown_strengths, side='right'), minlength=RANGE_BINS)
+    share = (shown + prior_hands * bin_sizes / NUM_COMBOS) / (len(shown_strengths) + prior_hands)
+    return (share / bin_sizes * NUM_COMBOS)[combo_bins]
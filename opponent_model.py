@@ -0,0 +1,189 @@
+'''
+Streaming statistics about the opponent, updated as the match goes so they
+are always current instead of being recomputed every few rounds.
+'''
+from skeleton.states import NUM_BOARDS
+
+STREET_INDEX = {0: 0, 3: 1, 4: 2, 5: 3}
+DECAY = .99 #weight an old observation keeps each time a new one comes in
+MIN_ROUNDS = 20 #rounds before the preflop raise rates are trusted
+DEFAULT_BOARD_STRENGTH = .6 #assumed opp strength on a board we haven't seen a showdown on
+RATE_FIELDS = ('postflop_raise', 'opp_fold', 'our_fold', 'bb_raise', 'sb_raise')
+COUNT_FIELDS = ('rounds', 'postflop_calls', 'bb_raise_count', 'sb_raise_count', 'sb_call_count', 'showdown_wins', 'showdown_losses')
+LIST_FIELDS = ('opp_fold_streets', 'our_fold_streets', 'board_strength_counts', 'board_strength_means')
+SNAPSHOT_SIZE = 2 * len(RATE_FIELDS) + len(COUNT_FIELDS) + 2 * len(STREET_INDEX) + 2 * NUM_BOARDS
+
+
+class DecayedRate():
+    '''
+    The fraction of observations that were hits, with older observations
+    weighted down exponentially so the rate follows an opponent who adapts.
+    '''
+    __slots__ = ('hits', 'total')
+
+    def __init__(self):
+        self.hits = 0.
+        self.total = 0.
+
+    def update(self, hit):
+        self.hits = self.hits * DECAY + hit
+        self.total = self.total * DECAY + 1
+
+    def rate(self, default=0.):
+        return self.hits / self.total if self.total > 0 else default
+
+
+class OpponentModel():
+    '''
+    Raise, fold and showdown statistics for the opponent (and our own folds),
+    kept as decayed rates, running means and per-street/per-board counters.
+    Every update is O(1).
+    '''
+    __slots__ = ('rounds', 'big_blind', 'preflop_raised',
+                 'postflop_raise', 'opp_fold', 'our_fold', 'bb_raise', 'sb_raise',
+                 'opp_fold_streets', 'our_fold_streets', 'postflop_calls', 'bb_raise_count', 'sb_raise_count', 'sb_call_count',
+                 'board_strength_counts', 'board_strength_means', 'showdown_wins', 'showdown_losses')
+
+    def __init__(self):
+        self.rounds = 0
+        self.big_blind = False
+        self.preflop_raised = [False] * NUM_BOARDS #did the opp raise preflop on each board this round
+        self.postflop_raise = DecayedRate() #per post flop decision of ours, did the opp raise
+        self.opp_fold = DecayedRate() #per board played, did the opp fold it
+        self.our_fold = DecayedRate()
+        self.bb_raise = DecayedRate() #per board, did the opp raise preflop from the big blind
+        self.sb_raise = DecayedRate() #per board, did the opp open raise from the small blind
+        self.opp_fold_streets = [0] * len(STREET_INDEX)
+        self.our_fold_streets = [0] * len(STREET_INDEX)
+        self.postflop_calls = 0
+        self.bb_raise_count = 0
+        self.sb_raise_count = 0
+        self.sb_call_count = 0
+        self.board_strength_counts = [0] * NUM_BOARDS
+        self.board_strength_means = [0.] * NUM_BOARDS #running mean of the opp's preflop strength at showdown
+        self.showdown_wins = 0.
+        self.showdown_losses = 0.
+
+    def start_round(self, big_blind):
+        self.big_blind = big_blind
+        self.preflop_raised = [False] * NUM_BOARDS
+
+    def observe_preflop(self, board, raised, from_big_blind):
+        '''
+        Records the opp's preflop action on a board we are about to act on.
+        '''
+        if not raised:
+            if not from_big_blind:
+                self.sb_call_count += 1
+            return
+        self.preflop_raised[board] = True
+        if from_big_blind:
+            self.bb_raise_count += 1
+        else:
+            self.sb_raise_count += 1
+
+    def observe_postflop(self, raised, called=False):
+        self.postflop_raise.update(raised)
+        if called:
+            self.postflop_calls += 1
+
+    def observe_showdown(self, board, opp_strength, our_share):
+        '''
+        Arguments:
+        opp_strength: the preflop strength of the hand the opp showed
+        our_share: 1 if we won the board, 0 if we lost it, .5 for a chop
+        '''
+        self.board_strength_counts[board] += 1
+        self.board_strength_means[board] += (opp_strength - self.board_strength_means[board]) / self.board_strength_counts[board]
+        self.showdown_wins += our_share
+        self.showdown_losses += 1 - our_share
+
+    def end_board(self, board, street, opp_folded, we_folded):
+        '''
+        Records how a board ended, once per board at the end of every round.
+        Arguments:
+        street: the street the round ended on
+        '''
+        self.opp_fold.update(opp_folded)
+        self.our_fold.update(we_folded)
+        if opp_folded:
+            self.opp_fold_streets[STREET_INDEX[street]] += 1
+        if we_folded:
+            self.our_fold_streets[STREET_INDEX[street]] += 1
+        if self.big_blind:
+            self.sb_raise.update(self.preflop_raised[board])
+        else:
+            self.bb_raise.update(self.preflop_raised[board])
+
+    def end_round(self):
+        self.rounds += 1
+
+    @property
+    def raise_rate(self):
+        return self.postflop_raise.rate()
+
+    @property
+    def opp_fold_rate(self):
+        return self.opp_fold.rate()
+
+    @property
+    def our_fold_rate(self):
+        return self.our_fold.rate()
+
+    @property
+    def bb_raise_rate(self):
+        '''
+        How often the opp raises from the big blind, or None before MIN_ROUNDS.
+        '''
+        return self.bb_raise.rate() if self.rounds >= MIN_ROUNDS else None
+
+    @property
+    def sb_raise_rate(self):
+        return self.sb_raise.rate() if self.rounds >= MIN_ROUNDS else None
+
+    def snapshot(self):
+        '''
+        Returns:
+        everything the model has learned as a flat list of SNAPSHOT_SIZE
+        numbers, for OpponentProfile to store between matches
+        '''
+        values = []
+        for name in RATE_FIELDS:
+            rate = getattr(self, name)
+            values += [rate.hits, rate.total]
+        values += [getattr(self, name) for name in COUNT_FIELDS]
+        for name in LIST_FIELDS:
+            values += getattr(self, name)
+        return values
+
+    def restore(self, values):
+        '''
+        Picks up where a snapshot() left off.
+        '''
+        values = list(values)
+        for name in RATE_FIELDS:
+            rate = getattr(self, name)
+            rate.hits, rate.total = values[:2]
+            values = values[2:]
+        for name in COUNT_FIELDS:
+            setattr(self, name, type(getattr(self, name))(values.pop(0)))
+        for name in LIST_FIELDS:
+            current = getattr(self, name)
+            size = len(current)
+            setattr(self, name, [type(current[0])(value) for value in values[:size]])
+            values = values[size:]
+
+    def board_strength(self, board):
+        if self.board_strength_counts[board] == 0:
+            return DEFAULT_BOARD_STRENGTH
+        return self.board_strength_means[board]
+
+    def summary(self):
+        return {
+            'opp post flop raise rate': self.raise_rate,
+            'opp fold rate': self.opp_fold_rate,
+            'our fold rate': self.our_fold_rate,
+            'our showdown wins': self.showdown_wins,
+            'our showdown losses': self.showdown_losses,
+            'opp avg strength by board': [self.board_strength(board) for board in range(NUM_BOARDS)],
+        }
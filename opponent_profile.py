@@ -0,0 +1,175 @@
+'''
+What we have learned about an opponent, kept on disk between matches so a
+later match against them starts from it instead of from the hard-coded
+priors. The engine doesn't tell us who we are playing, so the profile is
+picked by name (see OPPONENT_NAME in player.py).
+
+A profile is an append-only file of small fixed layout records: the opp
+bets, shown hands and showdowns of each round, plus a snapshot of the
+OpponentModel at the end of the round (the last one wins). The snapshot
+closes the round's records, so a round is only read back once its snapshot
+is on disk: a crash loses at most the round being written, and once a file
+holds more than COMPACT_RECORDS records it is rewritten as a single snapshot
+and the most recent entries.
+'''
+import math
+import os
+import re
+import struct
+from opponent_model import SNAPSHOT_SIZE
+from skeleton.states import NUM_BOARDS
+
+MAGIC = b'OPP1'
+KIND = struct.Struct('<c')
+MODEL = struct.Struct('<%df' % SNAPSHOT_SIZE) #OpponentModel.snapshot()
+BET = struct.Struct('<ff') #bet (pot odds offered), strength (nan if unknown)
+BOARD_HAND = struct.Struct('<Bf') #board, preflop strength of the hand shown
+RECORDS = {b'M': MODEL, b'B': BET, b'H': BET, b'S': BOARD_HAND}
+MAX_ENTRIES = 5000 #most recent bets/hands kept per list when compacting
+COMPACT_RECORDS = 20000
+
+
+def profile_path(directory, opponent):
+    '''
+    The file of an opponent's profile, with anything unusual in the name replaced.
+    '''
+    return os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]', '_', opponent) + '.opp')
+
+
+class OpponentProfile():
+    '''
+    One opponent's profile: read in full when it is opened, then appended to
+    once per round. With no path it only keeps the round's entries in memory,
+    so the bot can record into it the same way whether profiles are on or not.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.model = None #the latest OpponentModel snapshot
+        self.bet_strengths = [] #(bet, strength or None) for Player.opp_bets_strength
+        self.bet_hands = [] #(bet, strength) for Player.opp_bets_hands
+        self.board_hands = [[] for _ in range(NUM_BOARDS)] #for Player.opp_board_hands
+        self.records = 0
+        self.valid_size = 0 #bytes of whole records in the file
+        self.pending = [] #records of the round in progress
+        self.fp = None
+        if path is not None and os.path.exists(path):
+            self._read()
+
+    def _read(self):
+        '''
+        Reads the rounds in the file, each the records up to and including its
+        M record. Records after the last M are a round that was cut off and are
+        ignored (and truncated away when the file is next appended to).
+        '''
+        with open(self.path, 'rb') as fp:
+            data = fp.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError('not an opponent profile: ' + self.path)
+        offset = len(MAGIC)
+        self.valid_size = offset
+        frame = [] #the records of the round being read
+        while offset < len(data):
+            kind = data[offset: offset + 1]
+            record = RECORDS.get(kind)
+            if record is None or offset + 1 + record.size > len(data): #the end of a round that was cut off
+                break
+            fields = record.unpack_from(data, offset + 1)
+            offset += 1 + record.size
+            if kind != b'M':
+                frame.append((kind, fields))
+                continue
+            for entry_kind, entry in frame:
+                if entry_kind == b'B':
+                    self.bet_strengths.append((entry[0], None if math.isnan(entry[1]) else entry[1]))
+                elif entry_kind == b'H':
+                    self.bet_hands.append(entry)
+                else:
+                    self.board_hands[entry[0]].append(entry[1])
+            self.model = fields
+            self.records += len(frame) + 1
+            self.valid_size = offset
+            frame = []
+
+    def _record(self, kind, *fields):
+        self.pending.append(KIND.pack(kind) + RECORDS[kind].pack(*fields))
+
+    def add_bet_strength(self, bet, strength):
+        self.bet_strengths.append((bet, strength))
+        self._record(b'B', bet, float('nan') if strength is None else strength)
+
+    def add_bet_hand(self, bet, strength):
+        self.bet_hands.append((bet, strength))
+        self._record(b'H', bet, strength)
+
+    def add_board_hand(self, board, strength):
+        self.board_hands[board].append(strength)
+        self._record(b'S', board, strength)
+
+    def end_round(self, model):
+        '''
+        Appends the round's records and a snapshot of 'model' to the file.
+        '''
+        self.model = model.snapshot()
+        if self.path is None:
+            self.pending = []
+            return
+        self._record(b'M', *self.model)
+        if self.fp is None:
+            self._open()
+        self.fp.write(b''.join(self.pending))
+        self.fp.flush()
+        self.records += len(self.pending)
+        self.pending = []
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.records == 0:
+            self.fp = open(self.path, 'wb')
+            self.fp.write(MAGIC)
+        else:
+            self.fp = open(self.path, 'r+b')
+            self.fp.truncate(self.valid_size) #drop a round that was cut off, so appends stay readable
+            self.fp.seek(self.valid_size)
+
+    def compact(self):
+        '''
+        Rewrites the file as the latest snapshot plus the most recent
+        MAX_ENTRIES of each kind of entry.
+        '''
+        self._close_file()
+        self.bet_strengths = self.bet_strengths[-MAX_ENTRIES:]
+        self.bet_hands = self.bet_hands[-MAX_ENTRIES:]
+        self.board_hands = [hands[-MAX_ENTRIES:] for hands in self.board_hands]
+        for bet, strength in self.bet_strengths:
+            self._record(b'B', bet, float('nan') if strength is None else strength)
+        for bet, strength in self.bet_hands:
+            self._record(b'H', bet, strength)
+        for board, hands in enumerate(self.board_hands):
+            for strength in hands:
+                self._record(b'S', board, strength)
+        if self.model is not None:
+            self._record(b'M', *self.model)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as fp:
+            fp.write(MAGIC + b''.join(self.pending))
+        os.replace(temp_path, self.path) #the old file stays whole until the new one is
+        self.records = len(self.pending)
+        self.valid_size = len(MAGIC) + sum(len(record) for record in self.pending)
+        self.pending = []
+
+    def close(self):
+        '''
+        Closes the file, compacting it if it has grown past COMPACT_RECORDS.
+        '''
+        self._close_file()
+        if self.records > COMPACT_RECORDS:
+            self.compact()
+
+    def _close_file(self):
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+            self.valid_size = os.path.getsize(self.path)
@@ -6,12 +6,48 @@ from skeleton.states import GameState, TerminalState, RoundState, BoardState
 from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND, NUM_BOARDS
 from skeleton.bot import Bot
 from skeleton.runner import parse_args, run_bot
-import pickle
-import eval7
-import random
-import pandas as pd
+import itertools
+import os
 import numpy as np
-pd.set_option('display.max_rows', 1500)
+from equity import showdown_strength, anytime_strength, anytime_estimates
+from equity import exact_strength, exact_range_strength, enumeration_size, batch_strength, deck_from_mask, EXACT_MAX_COMBOS
+from equity_cache import EQUITY_CACHE
+from equity_table import EquityTable
+from scheduler import TimeBudget
+from bet_index import BetStrengthIndex
+from workers import BackgroundQueue, Speculator
+from preflop import load_class_strengths, build_strength_matrix
+from allocation import allocation_search
+from board_eval import BoardEvaluation
+from cards import card_to_int, parse_cards, card_mask
+from profiling import Profiler
+from decision_log import DecisionLog
+from opponent_model import OpponentModel
+from opponent_profile import OpponentProfile, profile_path
+from decision_table import DecisionTable, INTIMIDATION
+from opp_range import combo_strengths, range_weights, uniform_range
+
+EQUITY_TABLE_PATH = 'equity_table.bin' #flop equities built offline by equity_table.py, optional; they ignore our dead cards (see there)
+OPP_STRENGTH_ITERS = 2000 #samples for the opp strength jobs run in the background
+PROFILE = False #time callbacks and count samples/cache hits, dumped to PROFILE_PATH.json/.csv at the last round
+PROFILE_PATH = 'profile'
+EQUITY_CACHE_PATH = 'equity_cache.p'
+PERSIST_EQUITY_CACHE = False #load the equity cache at the start of the match and save it at the end
+SEED = None #seeds every random choice and sample in the match, None picks a fresh one (printed when DETERMINISTIC or DECISION_LOG_PATH is set)
+DETERMINISTIC = False #no clock based cutoffs and background jobs are always waited for, so a seeded match plays out the same every time
+DECISION_LOG_PATH = None #e.g. 'decisions.dlog' to record the match for replay.py
+RANGE_MIN_HANDS = 10 #shown hands near a bet size we need before playing against a range for it
+RANGE_MIN_ITERS = 500
+OPPONENT_NAME = os.environ.get('OPPONENT_NAME') #the opponent profile to start from and keep up to date, None for no profile
+OPPONENT_PROFILE_DIR = 'opponent_profiles'
+NUM_ITERS = 100 #the fewest samples calcualte_strength takes for a board, see bench_equity.py
+SB_FOLD_BELOW = .39 #preflop strength under which the small blind folds its first action
+SB_LIMP_BELOW = .5 #and under which it limps rather than opens
+OPEN_RAISE = 6 #the small blind's open
+PREFLOP_RAISE_ABOVE = .7 #preflop strength above which we reraise an opp raise or raise their limp
+RERAISE_POT_MULTIPLE = 2.5 #a preflop reraise, as a multiple of the pot once we have called
+LIMP_RAISE = 12 #the big blind's raise over a limp
+SPECULATE = True #while we wait on the engine, work out our exact equity for every card the next street could bring
 
 class Player(Bot):
     '''
@@ -27,195 +63,282 @@ class Player(Bot):
         Nothing.
         '''
         self.board_allocations = [[], [], []] #keep track of our allocations at round start
+        self.hole_ids = [[], [], []] #the same allocations as card ints, parsed once per round
+        self.dead_ids = [[], [], []] #our other four cards for each board, as card ints
+        self.board_evals = [None] * NUM_BOARDS #each board's BoardEvaluation, carried from street to street
         self.hole_strengths = None
-        self.our_fold_count = 0
-        self.opp_fold_count = 0
-        self.opp_fold_streets = {0: 0, 3: 0, 4: 0, 5: 0}
-        self.our_fold_streets = {0: 0, 3: 0, 4: 0, 5: 0}
-        self.opp_post_flop_raise_count = 0
-        self.opp_post_flop_no_raise_count = 0
+        self.opponent = OpponentModel() #raise/fold/showdown stats, updated as we go
+        self.decision_table = DecisionTable() #the betting formula terms that follow from self.opponent, rebuilt whenever it changes
         self.opp_bets_board = {0: [], 1: [], 2: []}
-        self.opp_bets_strength = pd.DataFrame(columns=['bet', 'strength'])
-        self.opp_post_flop_call_count = 0
-
-        self.our_post_flop_raise_count = 0
-
-        self.num_showdowns = 0
-        self.num_showdown_wins = 0
-        self.num_showdown_losses = 0
+        self.opp_bets_strength = BetStrengthIndex() #opp bet sizes and the strength they turned out to have
+        self.opp_bets_hands = BetStrengthIndex() #opp bet sizes and the preflop strength of the hand they showed
+        self.opp_board_hands = [[], [], []] #preflop strengths of the hands the opp showed on each board
+        self.uniform_range = uniform_range() #shared, so boards we know nothing about are only simulated once
+        self.prior_rounds = 0 #rounds against this opponent from earlier matches
         self.play_checkfold = False
-        with open('hand_strengths.p', 'rb') as fp:
-            self.hand_strengths = pickle.load(fp)
-        # self.preflop_hand_strength_list = []
-        # for key in self.hand_strengths.keys():
-        #     print(key, ': ', self.hand_strengths[key]['win_prob'] + .5 * self.hand_strengths[key]['draw_prob'])
-        self.card_val_order = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
-        self.our_raise_rate = 0
-        self.opp_raise_rate = 0
-        self.our_fold_rate = 0
-        self.opp_fold_rate = 0
-
-        self.opp_bb_raise_count = 0
-        self.opp_bb_raise_rate = None
-        self.opp_sb_raise_count = 0
-        self.opp_sb_raise_rate = None
-
-        self.opp_sb_call_count = 0
-        self.opp_sb_call_rate = None
-
+        self.pair_strengths = None #52x52 preflop strengths indexed by card ints, loaded at the first allocation
+        self.combo_strengths = None #the same for the 1326 opp_range combos
+        if os.path.exists(EQUITY_TABLE_PATH):
+            self.equity_table = EquityTable.load(EQUITY_TABLE_PATH)
+        else:
+            self.equity_table = None
+        if OPPONENT_NAME is not None and not DETERMINISTIC:
+            self.opp_profile = OpponentProfile(profile_path(OPPONENT_PROFILE_DIR, OPPONENT_NAME))
+        else:
+            self.opp_profile = OpponentProfile(None)
+        self.load_opp_profile()
+        if DETERMINISTIC:
+            EQUITY_CACHE.clear() #cached estimates from earlier matches in this process would change what we sample
+        elif PERSIST_EQUITY_CACHE and os.path.exists(EQUITY_CACHE_PATH):
+            EQUITY_CACHE.load(EQUITY_CACHE_PATH)
+        self.seed = SEED if SEED is not None else int(np.random.SeedSequence().entropy % 2 ** 63)
+        if DETERMINISTIC or DECISION_LOG_PATH is not None: #only worth knowing when the match can be replayed
+            print('seed:', self.seed)
+        sampling_seed, decision_seed, background_seed = np.random.SeedSequence(self.seed).spawn(3)
+        self.rng = np.random.default_rng(sampling_seed)
+        self.decision_rng = np.random.default_rng(decision_seed) #the random choices in get_actions, kept apart so they don't depend on how much we sampled
+        self.time_budget = TimeBudget(NUM_ROUNDS, deterministic=DETERMINISTIC) #splits the game clock between decisions
+        self.background = BackgroundQueue() #opp strength jobs queued at round over
+        self.background_rng = np.random.default_rng(background_seed) #numpy generators aren't thread safe, so the jobs get their own
+        self.speculator = Speculator() #next street equities, stopped whenever the engine calls us again
         self.board_folds = [False, False, False]
-        self.our_showdown_losses = 0
-        self.our_showdown_wins = 0
-        self.opp_board_strengths = {0: [], 1: [], 2: []}
-        self.opp_board_avg_strength_ranking = None
+
+        self.profiler = Profiler(PROFILE)
+        self.profiler.instrument(self, { #labels each timing gets
+            'handle_new_round': None,
+            'get_actions': lambda game_state, round_state, active: (round_state.street,),
+            'handle_round_over': None,
+            'allocate_cards': None,
+            'calcualte_strength': lambda hole, iters, board_cards, *args, **kwargs: (len([card for card in board_cards if card != '']),),
+            'calcualte_board_strengths': lambda street, *args: (street,),
+            'calcualte_range_strength': lambda hole, board_cards, *args: (len([card for card in board_cards if card != '']),),
+        })
+        if DECISION_LOG_PATH is not None:
+            self.decision_log = DecisionLog(DECISION_LOG_PATH, self.seed)
+            self.decision_log.attach(self, lambda round_state: self.hole_strengths[round_state.street])
 
 
     def allocate_cards(self, my_cards):
         '''
         Method that allocates our cards at the beginning of a round. Method
-        modifies self.board_allocations. The method attempts to make pairs
-        by allocating hole cards that share a rank if possible. The exact
-        stack these cards are allocated to is not defined.
+        modifies self.board_allocations. Every way of splitting our cards into
+        three pairs and putting them on the boards is scored by simulated
+        showdowns against the hands the opp has shown on each board, within
+        this round's time budget. self.hole_strengths[0] still gets the
+        preflop table strength of each pair, which the preflop play uses.
         Arguments:
         my_cards: a list of the 6 cards given to us at round start
         '''
-        possible_card_assignments = [
-            [[0, 1], [2, 3], [4, 5]],
-            [[0, 1], [2, 4], [3, 5]],
-            [[0, 1], [2, 5], [3, 4]],
-
-            [[0, 2], [1, 3], [4, 5]],
-            [[0, 2], [1, 4], [3, 5]],
-            [[0, 2], [1, 5], [3, 4]],
-
-            [[0, 3], [1, 2], [4, 5]],
-            [[0, 3], [1, 4], [2, 5]],
-            [[0, 3], [1, 5], [2, 4]],
-
-            [[0, 4], [1, 2], [3, 5]],
-            [[0, 4], [1, 3], [2, 5]],
-            [[0, 4], [1, 5], [2, 3]],
-
-            [[0, 5], [1, 2], [3, 4]],
-            [[0, 5], [1, 3], [2, 4]],
-            [[0, 5], [1, 4], [2, 3]],
-        ]
-        best_allocation = None
-        best_allocation_strength = -1
-        for possible_allocation in possible_card_assignments:
-            allocation_strength_list = []
-            #cauclate the weighted hand strnght for each possible paring
-            for card_pair_indices in possible_allocation:
-                card_pair = [my_cards[card_pair_indices[0]], my_cards[card_pair_indices[1]]]
-                card1_value = my_cards[card_pair_indices[0]][0]
-                card2_value = my_cards[card_pair_indices[1]][0]
-                card1_suit = my_cards[card_pair_indices[0]][1]
-                card2_suit = my_cards[card_pair_indices[1]][1]
-                if card1_suit == card2_suit:
-                    suit_relation = 'same'
-
-                else:
-                    suit_relation = 'diff'
-                if card1_value == card2_value:
-                    card_pair_tup = (card1_value, card2_value)
-                else:
-                    card1_value_index = [i for i in range(len(self.card_val_order)) if self.card_val_order[i] == card1_value]
-                    card2_value_index = [i for i in range(len(self.card_val_order)) if self.card_val_order[i] == card2_value]
-
-                    if card1_value_index > card2_value_index:
-                        card_pair_tup = (card2_value, card1_value, suit_relation)
-                    else:
-                        card_pair_tup = (card1_value, card2_value, suit_relation)
-
-                pair_strength = self.hand_strengths[card_pair_tup]['win_prob'] + .5 * self.hand_strengths[card_pair_tup]['draw_prob']
+        if self.pair_strengths is None:
+            self.pair_strengths = build_strength_matrix(load_class_strengths())
+            self.combo_strengths = combo_strengths(self.pair_strengths)
+        board_ranges = []
+        for i in range(NUM_BOARDS):
+            if len(self.opp_board_hands[i]) >= RANGE_MIN_HANDS:
+                board_ranges.append(range_weights(self.combo_strengths, self.opp_board_hands[i]))
+            else:
+                board_ranges.append(self.uniform_range)
+        card_ids = [card_to_int(card) for card in my_cards]
+        assignment = self.time_budget.timed(allocation_search, card_ids, board_ranges, self.rng)
+        self.profiler.count('allocation_samples', self.time_budget.last_samples)
+        self.set_allocation(my_cards, assignment)
 
-                allocation_strength_list.append([card_pair, pair_strength])
-            allocation_strength_list = sorted(allocation_strength_list, key=lambda x: x[1])
-            allocation_weighted_strength = 0
-            for i in range(NUM_BOARDS):
-                # allocation_weighted_strength += allocation_strength_list[i][1] * (i + 1)
-                allocation_weighted_strength += allocation_strength_list[i][1]
-            if allocation_weighted_strength > best_allocation_strength:
-                best_allocation_strength = allocation_weighted_strength
-                best_allocation = allocation_strength_list
-        if self.opp_board_avg_strength_ranking is not None:
-            count = 0
-            for board in self.opp_board_avg_strength_ranking:
-                self.board_allocations[board] = best_allocation[(count + 1) % 3][0]
-                self.hole_strengths[0][board] = best_allocation[(count + 1) % 3][1]
-                count += 1
-        else:
-            self.board_allocations = [best_allocation[1][0], best_allocation[2][0], best_allocation[0][0]]
-            self.hole_strengths[0] = [best_allocation[1][1], best_allocation[2][1], best_allocation[0][1]]
-        # for i in range(NUM_BOARDS):
-            # self.board_allocations[i] = best_allocation[i][0]
-            # self.hole_strengths[0][i] = best_allocation[i][1]
-            # self.board_allocations[i] = best_allocation[2-i][0]
-            # self.hole_strengths[0][i] = best_allocation[2-i][1]
+    def set_allocation(self, my_cards, assignment):
+        '''
+        Puts our cards on the boards and starts each board's state from them.
+        Arguments:
+        my_cards: a list of the 6 cards given to us at round start
+        assignment: for each board, the indices into my_cards of its pair
+        '''
+        card_ids = [card_to_int(card) for card in my_cards]
+        for i, pair_indices in enumerate(assignment):
+            self.board_allocations[i] = [my_cards[index] for index in pair_indices]
+            self.hole_ids[i] = [card_ids[index] for index in pair_indices]
+            self.dead_ids[i] = [card_ids[index] for index in range(len(card_ids)) if index not in pair_indices]
+            self.board_evals[i] = BoardEvaluation(self.hole_ids[i], self.dead_ids[i])
+            self.hole_strengths[0][i] = float(self.pair_strengths[card_ids[pair_indices[0]], card_ids[pair_indices[1]]])
 
 
     def calcualte_strength(self, hole, iters, board_cards, dead_cards, opp_known_cards=None):
         '''
-        A Monte Carlo method meant to estimate the win probability of a pair of
-        hole cards. Simlulates 'iters' games and determines the win rates of our cards
+        Estimates the win probability of a pair of hole cards. Exact enumeration
+        is used whenever the street is late enough for it to be cheap, otherwise
+        the precomputed equity table, then the equity cache, and we only fall
+        back to Monte Carlo sampling when none of them apply. Sampling runs
+        until the estimate is tight enough or the clock budget for this
+        decision is spent.
         Arguments:
         hole: a list of our two hole cards
-        iters: a integer that determines how many Monte Carlo samples to take
+        iters: the minimum number of Monte Carlo samples to take
         '''
-
-        deck = eval7.Deck() #eval7 object!
-        hole_cards = [eval7.Card(card) for card in hole] #card objects, used to evaliate hands
-        board_cards = [eval7.Card(card) for card in board_cards if card != '']
-        dead_cards = [eval7.Card(card) for card in dead_cards]
-
-        for card in hole_cards: #remove cards that we know about! they shouldn't come up in simulations
-            deck.cards.remove(card)
-        for card in board_cards:
-            deck.cards.remove(card)
-        for card in dead_cards:
-            deck.cards.remove(card)
-
-        score = 0
         if opp_known_cards is not None:
-            opp_known_cards = [eval7.Card(card) for card in opp_known_cards]
-            our_hand = hole_cards + board_cards
-            opp_hand = opp_known_cards + board_cards
-            our_hand_value = eval7.evaluate(our_hand) #the ranks of our hands (only useful for comparisons)
-            opp_hand_value = eval7.evaluate(opp_hand)
-            if our_hand_value > opp_hand_value:
-                return 1
-            elif our_hand_value < opp_hand_value:
-                return 0
-            else:
-                return .5
+            return showdown_strength(hole, board_cards, opp_known_cards)
 
-        for _ in range(iters): #take 'iters' samples
-            deck.shuffle() #make sure our samples are random
+        if enumeration_size(hole, board_cards, dead_cards) <= EXACT_MAX_COMBOS:
+            return exact_strength(hole, board_cards, dead_cards)
 
-            _COMM = 5 - len(board_cards) #the number of cards we need to draw
-            _OPP = 2
+        if self.equity_table is not None: #only for situations we would otherwise sample, its equities ignore our dead cards
+            hand_strength = self.equity_table.lookup(hole, board_cards)
+            if hand_strength is not None:
+                return hand_strength
 
-            draw = deck.peek(_COMM + _OPP)
+        cache_key = EQUITY_CACHE.key(hole, board_cards, dead_cards)
+        hand_strength = EQUITY_CACHE.get(cache_key)
+        if hand_strength is not None:
+            return hand_strength
 
-            opp_hole = draw[: _OPP]
-            community = draw[_OPP: ]
-            community = community + board_cards
+        strengths = self.time_budget.timed(anytime_strength, [(hole, board_cards, dead_cards)], self.rng, min_iters=iters)
+        self.profiler.count('mc_samples', self.time_budget.last_samples)
+        EQUITY_CACHE.put(cache_key, strengths[0])
+        return strengths[0]
 
-            our_hand = hole_cards + community #the two showdown hands
-            opp_hand = opp_hole + community
-
-            our_hand_value = eval7.evaluate(our_hand) #the ranks of our hands (only useful for comparisons)
-            opp_hand_value = eval7.evaluate(opp_hand)
-
-            if our_hand_value > opp_hand_value: #we win!
-                score += 2
-
-            elif our_hand_value == opp_hand_value: #we tie.
-                score += 1
+    def calcualte_board_strengths(self, street, board_cards, board_states):
+        '''
+        Fills in self.hole_strengths[street] for every board still in play that
+        we haven't scored yet on this street. Boards small enough to enumerate
+        get their exact equity, the others are looked up in the equity table,
+        boards we have sampled before (in any round) come from the equity cache
+        and the rest are sampled together by the anytime batch estimator.
+        Arguments:
+        street: 3, 4, or 5
+        board_cards: the board cards of each board, as card ints
+        board_states: the board states from the RoundState
+        '''
+        missing = []
+        situations = []
+        cache_keys = []
+        for i in range(NUM_BOARDS):
+            if self.hole_strengths[street][i] is not None or not isinstance(board_states[i], BoardState):
+                continue
+            hole_cards = self.hole_ids[i]
+            dead_cards = self.dead_ids[i]
+            with self.profiler.section('board_strength', street, i):
+                if enumeration_size(hole_cards, board_cards[i], dead_cards) <= EXACT_MAX_COMBOS:
+                    self.hole_strengths[street][i] = self.board_evals[i].exact_strength()
+                    self.profiler.count('exact', 1, street)
+                elif self.equity_table is not None:
+                    self.hole_strengths[street][i] = self.equity_table.lookup(hole_cards, board_cards[i])
+                    self.profiler.count('table_miss' if self.hole_strengths[street][i] is None else 'table_hit', 1, street)
+                if self.hole_strengths[street][i] is None:
+                    cache_key = EQUITY_CACHE.key(hole_cards, board_cards[i], dead_cards)
+                    self.hole_strengths[street][i] = EQUITY_CACHE.get(cache_key)
+                    self.profiler.count('cache_miss' if self.hole_strengths[street][i] is None else 'cache_hit', 1, street)
+            if self.hole_strengths[street][i] is None:
+                missing.append(i)
+                situations.append((hole_cards, board_cards[i], dead_cards))
+                cache_keys.append(cache_key)
+        if len(missing) == 0:
+            return
+        with self.profiler.section('board_sampling', street):
+            strengths, errors = self.time_budget.timed(anytime_estimates, situations, self.rng)
+        self.profiler.count('sampled_boards', len(missing), street)
+        self.profiler.count('mc_samples', self.time_budget.last_samples, street)
+        self.profiler.count('std_error', sum(errors), street) #divided by sampled_boards, the average standard error of a sampled equity
+        for i, cache_key, hand_strength in zip(missing, cache_keys, strengths):
+            self.hole_strengths[street][i] = hand_strength
+            EQUITY_CACHE.put(cache_key, hand_strength)
+
+    def calcualte_opp_strength(self, bet, opp_cards, board_cards):
+        '''
+        Background job: how strong the opponent's revealed hand was on the board
+        they bet into. Uses a fixed number of samples rather than the time
+        budget, since it runs while we would otherwise be waiting on the engine.
+        Returns:
+        the (bet, strength) pair to add to self.opp_bets_strength
+        '''
+        if enumeration_size(opp_cards, board_cards, []) <= EXACT_MAX_COMBOS:
+            return bet, exact_strength(opp_cards, board_cards, [])
+        if self.equity_table is not None:
+            strength = self.equity_table.lookup(opp_cards, board_cards)
+            if strength is not None:
+                return bet, strength
+        cache_key = EQUITY_CACHE.key(opp_cards, board_cards, [])
+        strength = EQUITY_CACHE.get(cache_key)
+        if strength is None:
+            strength = batch_strength([(opp_cards, board_cards, [])], OPP_STRENGTH_ITERS, self.background_rng)[0]
+            EQUITY_CACHE.put(cache_key, strength)
+        return bet, strength
+
+    def calcualte_range_strength(self, hole, board_cards, dead_cards, shown_strengths):
+        '''
+        Our win probability against the range of hands the opponent has shown
+        down after bets like the one we are facing, rather than a random hand.
+        Complete boards are scored exactly, otherwise the opp hands are sampled
+        from the range under the decision's time budget.
+        Arguments:
+        shown_strengths: preflop strengths of the hands the opp showed
+        '''
+        opp_range = range_weights(self.combo_strengths, shown_strengths)
+        if len([card for card in board_cards if card != '']) == 5:
+            return exact_range_strength(hole, board_cards, dead_cards, opp_range)
+        strengths = self.time_budget.timed(anytime_strength, [(hole, board_cards, dead_cards, opp_range)], self.rng, min_iters=RANGE_MIN_ITERS)
+        self.profiler.count('range_samples', self.time_budget.last_samples)
+        return strengths[0]
+
+    def speculate_strength(self, evaluation, card):
+        '''
+        Speculative job: our equity on a board if 'card' comes next. Leaves it
+        in EQUITY_CACHE (BoardEvaluation.exact_strength stores its results
+        there), where calcualte_board_strengths will find it. The equity table
+        isn't consulted: speculation only runs for streets that are enumerated,
+        and those never use the table.
+        Arguments:
+        evaluation: a copy of the board's BoardEvaluation, not the live one
+        '''
+        evaluation.branch(card).exact_strength()
 
-        hand_strength = score / (2 * iters) #this is our win probability!
+    def speculate_next_street(self, board_cards, board_states):
+        '''
+        Starts the speculator on every next card of every board we are still
+        in, a card for each board in turn so that a run cut short still helps
+        all of them. Only streets whose next street can be enumerated exactly
+        are worth it, so in practice the flop (for the turn) and the turn (for
+        the river, unless enumerating the turn already gave every river).
+        Arguments:
+        board_cards: the board cards of each board, as card ints
+        '''
+        per_board = []
+        for i in range(NUM_BOARDS):
+            if self.board_folds[i] or not isinstance(board_states[i], BoardState):
+                continue
+            hole, board, dead = self.hole_ids[i], board_cards[i], self.dead_ids[i]
+            if len(board) == 5 or enumeration_size(hole, board + [0], dead) > EXACT_MAX_COMBOS: #[0] stands in for the next card
+                continue
+            evaluation = self.board_evals[i]
+            if len(evaluation.next_strengths) > 0:
+                continue
+            evaluation = evaluation.copy() #get_actions advances the live one while the jobs may still be reading
+            per_board.append([(evaluation, card) for card in deck_from_mask(card_mask(hole + board + dead)).tolist()])
+        if len(per_board) > 0:
+            self.speculator.start(self.speculate_strength, [args for column in itertools.zip_longest(*per_board) for args in column if args is not None])
+
+    def load_opp_profile(self):
+        '''
+        Starts the opponent stats from what earlier matches against this
+        opponent left in self.opp_profile, if anything.
+        '''
+        if self.opp_profile.model is not None:
+            self.opponent.restore(self.opp_profile.model)
+        for bet, strength in self.opp_profile.bet_strengths:
+            self.opp_bets_strength.add(bet, strength)
+        for bet, strength in self.opp_profile.bet_hands:
+            self.opp_bets_hands.add(bet, strength)
+        for i in range(NUM_BOARDS):
+            self.opp_board_hands[i] = list(self.opp_profile.board_hands[i])
+        self.prior_rounds = self.opponent.rounds
+        self.decision_table.update(self.opponent, INTIMIDATION)
+        if self.prior_rounds > 0:
+            print('opponent profile:', self.prior_rounds, 'rounds')
 
-        return hand_strength
+    def collect_opp_strengths(self, block=False):
+        '''
+        Folds the finished background opp strength jobs into self.opp_bets_strength.
+        Arguments:
+        block: wait for all of the queued jobs first
+        '''
+        for bet, strength in self.background.drain(block):
+            self.opp_bets_strength.add(bet, strength)
+            self.opp_profile.add_bet_strength(bet, strength)
 
     def handle_new_round(self, game_state, round_state, active):
         '''
@@ -235,7 +358,10 @@ class Player(Bot):
         round_num = game_state.round_num  # the round number from 1 to NUM_ROUNDS
         my_cards = round_state.hands[active]  # your six cards at the start of the round
         big_blind = bool(active)  # True if you are the big blind
-        self.allocate_cards(my_cards) #our old allocation strategy
+        self.time_budget.start_round(game_clock, round_num)
+        self.opponent.start_round(big_blind)
+        self.collect_opp_strengths(block=(round_num + self.prior_rounds == 30 or DETERMINISTIC)) #the opp bet model is first used in round 30
+        self.allocate_cards(my_cards) #split our cards over the boards
 
         bankroll_lead = my_bankroll - opp_bankroll
         if round_num % 2 == 1: #even number of rounds left to be played
@@ -250,37 +376,9 @@ class Player(Bot):
         if bankroll_lead > checkfold_loss + 1:
             if self.play_checkfold == False:
                 print('Playing checkfold starting at round', round_num)
-                print('opp post flop raise rate: ', self.opp_raise_rate)
-                print('opp fold rate', self.opp_fold_rate)
-                print('our fold rate', self.our_fold_rate)
-                print('our showdown wins', self.our_showdown_wins)
-                print('our showdown losses', self.our_showdown_losses)
-                for i in range(3):
-                    print('board #', i, ' opp avg strength:',
-                          sum(self.opp_board_strengths[i]) / len(self.opp_board_strengths[i]))
+                print('opponent:', self.opponent.summary())
 
             self.play_checkfold = True
-        if round_num >= 29 and round_num % 10 == 0:
-            self.opp_raise_rate = self.opp_post_flop_raise_count / (self.opp_post_flop_raise_count + self.opp_post_flop_no_raise_count)
-            if self.opp_post_flop_raise_count > 0:
-                self.our_fold_rate = self.our_fold_count / (3 * (round_num + 1))
-            if self.our_post_flop_raise_count > 0:
-                self.opp_fold_rate = self.opp_fold_count / (3 * (round_num + 1))
-
-        if round_num >= 14 and round_num % 10 == 0:
-            opp_board_stren_lol = []
-            for i in range(3):
-                if len(self.opp_board_strengths[i]) > 0:
-                    opp_board_stren_lol.append([i, sum(self.opp_board_strengths[i]) / len(self.opp_board_strengths[i])])
-                else:
-                    opp_board_stren_lol.append([i, .6])
-
-            sorted_opp_board_stren_lol = sorted(opp_board_stren_lol, key=lambda x: x[1])
-            self.opp_board_avg_strength_ranking = []
-            for pair in sorted_opp_board_stren_lol:
-                self.opp_board_avg_strength_ranking.append(pair[0])
-            self.opp_bb_raise_rate = self.opp_bb_raise_count / (3 * round_num / 2)
-            self.opp_sb_raise_rate = self.opp_sb_raise_count / (3 * round_num / 2)
 
 
 
@@ -294,20 +392,24 @@ class Player(Bot):
         Returns:
         Nothing.
         '''
+        self.speculator.stop() #the round is over, so are its next streets
+        self.profiler.count('speculated', sum(self.speculator.drain()))
         my_delta = terminal_state.deltas[active]  # your bankroll change from this round
         opp_delta = terminal_state.deltas[1-active] # your opponent's bankroll change from this round
         previous_state = terminal_state.previous_state  # RoundState before payoffs
         street = previous_state.street  # 0, 3, 4, or 5 representing when this round ended  W
         opp_card_lol = []
-        for terminal_board_state in previous_state.board_states:
+        for i, terminal_board_state in enumerate(previous_state.board_states):
             previous_board_state = terminal_board_state.previous_state
             my_cards = previous_board_state.hands[active]  # your cards
             opp_cards = previous_board_state.hands[1-active]  # opponent's cards or [] if not revealed
             opp_card_lol.append(opp_cards)
             if opp_cards != ['', ''] and opp_cards != []: #there was a showdown
                 showdown_res = self.calcualte_strength(my_cards, 1, previous_board_state.deck, [], opp_known_cards = opp_cards)
-                self.our_showdown_wins += showdown_res
-                self.our_showdown_losses += (1 - showdown_res)
+                pair_strength = float(self.pair_strengths[card_to_int(opp_cards[0]), card_to_int(opp_cards[1])])
+                self.opponent.observe_showdown(i, pair_strength + .015 * i, showdown_res)
+                self.opp_board_hands[i].append(pair_strength)
+                self.opp_profile.add_board_hand(i, pair_strength)
 
 
 
@@ -317,78 +419,42 @@ class Player(Bot):
         round_num = game_state.round_num #Monte Carlo takes a lot of time, we use this to adjust!
         for i in range(3):
             opp_cards = opp_card_lol[i]
-            if (opp_cards == ['', ''] or opp_cards == []) and not self.board_folds[i]:
-                self.opp_fold_count += 1
-            elif self.board_folds[i]:
-                self.our_fold_count += 1
-            if opp_cards != [] and opp_cards != ['', '']:
-                card1_value = opp_cards[0][0]
-                card2_value = opp_cards[1][0]
-                card1_suit = opp_cards[0][1]
-                card2_suit = opp_cards[1][1]
-                if card1_suit == card2_suit:
-                    suit_relation = 'same'
-
-                else:
-                    suit_relation = 'diff'
-                if card1_value == card2_value:
-                    card_pair_tup = (card1_value, card2_value)
-                else:
-                    card1_value_index = [i for i in range(len(self.card_val_order)) if
-                                         self.card_val_order[i] == card1_value]
-                    card2_value_index = [i for i in range(len(self.card_val_order)) if
-                                         self.card_val_order[i] == card2_value]
-
-                    if card1_value_index > card2_value_index:
-                        card_pair_tup = (card2_value, card1_value, suit_relation)
-                    else:
-                        card_pair_tup = (card1_value, card2_value, suit_relation)
-
-                pair_strength = self.hand_strengths[card_pair_tup]['win_prob'] + .5 * \
-                                self.hand_strengths[card_pair_tup]['draw_prob'] + .015 * i
-                self.opp_board_strengths[i].append(pair_strength)
+            opp_folded = (opp_cards == ['', ''] or opp_cards == []) and not self.board_folds[i]
+            self.opponent.end_board(i, street, opp_folded, self.board_folds[i])
 
             for bet, board in self.opp_bets_board[i]:
-                opp_strength_at_bet = None
-                if opp_cards != ['', '']:
-                    _ITERS = 200
-                    opp_strength_at_bet = self.calcualte_strength(opp_cards, _ITERS, board, [])
-                self.opp_bets_strength = self.opp_bets_strength.append({'bet': bet, 'strength': opp_strength_at_bet}, ignore_index=True)
+                if opp_cards != ['', ''] and opp_cards != []:
+                    self.background.submit(self.calcualte_opp_strength, bet, opp_cards, board)
+                    shown_strength = float(self.pair_strengths[card_to_int(opp_cards[0]), card_to_int(opp_cards[1])])
+                    self.opp_bets_hands.add(bet, shown_strength)
+                    self.opp_profile.add_bet_hand(bet, shown_strength)
+                else:
+                    self.opp_bets_strength.add(bet, None)
+                    self.opp_profile.add_bet_strength(bet, None)
 
         self.board_allocations = [[], [], []] #reset our variables at the end of every round!
         self.hole_strengths = {0: [None] * NUM_BOARDS, 3: [None] * NUM_BOARDS, 4: [None] * NUM_BOARDS, 5: [None] * NUM_BOARDS}
         self.board_folds = [False, False, False]
+        self.opponent.end_round()
+        self.decision_table.update(self.opponent, INTIMIDATION)
+        if round_num == NUM_ROUNDS: #no next round to collect them in, and background.close() would cancel them
+            self.collect_opp_strengths(block=True)
+        self.opp_profile.end_round(self.opponent)
+        self.time_budget.end_round(game_clock)
 
 
         if round_num == NUM_ROUNDS:
-            # print(self.opp_bets_strength[self.opp_bets_strength['strength'].notna()].sort_values(by='strength'))
             if not self.play_checkfold:
-                print('opp post flop raise rate: ', self.opp_raise_rate)
-                print('opp fold rate', self.opp_fold_rate)
-                print('our fold rate', self.our_fold_rate)
-                print('our showdown wins', self.our_showdown_wins)
-                print('our showdown losses', self.our_showdown_losses)
-                for i in range(3):
-                    print('board #', i, ' opp avg strength:', sum(self.opp_board_strengths[i]) / len(self.opp_board_strengths[i]))
+                print('opponent:', self.opponent.summary())
             print(game_clock)
-
-
-
-
-
-
-
-    def get_bet_amount(self, strength, pot_size):
-        bet_amount = -106.02197802198144 + 616.7786499215267*strength - 1310.2537938252638 * (strength ** 2) + 1206.0439560439938 * (strength ** 3)  - 405.54683411827534 * (strength ** 4)
-        # print('-------')
-        # print('assumed pot size: ', pot_size)
-        # print('hand_strength: ', strength)
-        # print('bet amount as % of pot:', bet_amount)
-        bet_amount = min(1.1, bet_amount)
-        bet_amount = max(0, bet_amount)
-        bet_amount = bet_amount * pot_size
-        # print('bet amount: ', bet_amount)
-        return bet_amount
+            print('time budget:', self.time_budget.summary())
+            self.background.close()
+            self.speculator.close()
+            self.opp_profile.close()
+            self.profiler.dump(PROFILE_PATH, {'time_budget': self.time_budget.summary(), 'equity_cache': EQUITY_CACHE.stats()})
+            print('equity cache:', EQUITY_CACHE.stats())
+            if PERSIST_EQUITY_CACHE:
+                EQUITY_CACHE.save(EQUITY_CACHE_PATH)
 
     def get_actions(self, game_state, round_state, active):
         '''
@@ -403,12 +469,20 @@ class Player(Bot):
 
         TODO: Add a checkfold strategy when we have accumulated enough of a lead that we can still end the game with more chips than the opponent by just giving away the blinds
         '''
+        self.speculator.stop() #whatever it hasn't finished we would rather not wait for
         legal_actions = round_state.legal_actions()  # the actions you are allowed to take
         street = round_state.street  # 0, 3, 4, or 5 representing pre-flop, flop, turn, or river respectively
-        my_cards = round_state.hands[active]  # your cards across all boards
-        board_cards = [board_state.deck if isinstance(board_state, BoardState) else board_state.previous_state.deck for board_state in round_state.board_states] #the board cards
-        my_pips = [board_state.pips[active] if isinstance(board_state, BoardState) else 0 for board_state in round_state.board_states] # the number of chips you have contributed to the pot on each board this round of betting
-        opp_pips = [board_state.pips[1-active] if isinstance(board_state, BoardState) else 0 for board_state in round_state.board_states] # the number of chips your opponent has contributed to the pot on each board this round of betting
+        board_cards = [None] * NUM_BOARDS #the board cards, as card ints
+        my_pips = [0] * NUM_BOARDS # the number of chips you have contributed to the pot on each board this round of betting
+        opp_pips = [0] * NUM_BOARDS # the number of chips your opponent has contributed to the pot on each board this round of betting
+        for i, board_state in enumerate(round_state.board_states): #one pass over the boards, each board's cards parsed once
+            if isinstance(board_state, BoardState):
+                board_cards[i] = parse_cards(board_state.deck)
+                self.board_evals[i].advance(board_cards[i])
+                my_pips[i] = board_state.pips[active]
+                opp_pips[i] = board_state.pips[1-active]
+            else:
+                board_cards[i] = parse_cards(board_state.previous_state.deck)
         continue_cost = [opp_pips[i] - my_pips[i] for i in range(NUM_BOARDS)] #the number of chips needed to stay in each board's pot
         my_stack = round_state.stacks[active]  # the number of chips you have remaining
         opp_stack = round_state.stacks[1-active]  # the number of chips your opponent has remaining
@@ -428,6 +502,8 @@ class Player(Bot):
                     my_actions[i] = CheckAction()
             return my_actions
 
+        if street >= 3: #score all the live boards at once before deciding on each
+            self.calcualte_board_strengths(street, board_cards, round_state.board_states)
 
         for i in range(NUM_BOARDS):
             if AssignAction in legal_actions[i]:
@@ -443,14 +519,13 @@ class Player(Bot):
                     opp_last_action = 'Raise'
                 elif round_state.board_states[i].settled:
                     opp_last_action = 'Call'
-                    if game_state.round_num >= 3:
-                        self.opp_post_flop_call_count += 1
                 else:
                     opp_last_action = 'Check'  # OR FOLD BUT IF THEY FOLD WE WON
 
 
-                if opp_last_action != 'Raise' and street >= 3:
-                    self.opp_post_flop_no_raise_count += 1
+                if street >= 3:
+                    self.opponent.observe_postflop(opp_last_action == 'Raise', opp_last_action == 'Call')
+                    self.decision_table.update(self.opponent, INTIMIDATION)
 
 
 
@@ -464,19 +539,19 @@ class Player(Bot):
                 if street == 0: #preflop
                     if active == 0: #we are small blind
                         if board_cont_cost == 1: #first action
-                            if self.hole_strengths[0][i] < .39: # bottom of our range --> LIMP
+                            if self.hole_strengths[0][i] < SB_FOLD_BELOW: # bottom of our range --> LIMP
                                 my_actions[i] = FoldAction()
                                 continue
-                            elif self.hole_strengths[0][i] < .5: # bottom of our range --> LIMP
+                            elif self.hole_strengths[0][i] < SB_LIMP_BELOW: # bottom of our range --> LIMP
                                 # my_actions[i] = FoldAction()
                                 my_actions[i] = CallAction()
                                 net_cost += board_cont_cost
                                 continue
                             else: #we are going to open
                                 if game_state.round_num < 30:
-                                    raise_amount = 6
+                                    raise_amount = OPEN_RAISE
                                 else:
-                                    raise_amount = 6
+                                    raise_amount = OPEN_RAISE
                                     # raise_amount = self.get_open_raise_amount()
                                 raise_amount = max([min_raise, raise_amount])  # make sure we have a valid raise
                                 raise_amount = min([max_raise, raise_amount])
@@ -485,18 +560,15 @@ class Player(Bot):
                                 # self.our_pre_flop_raise_count += 1
                                 continue
                         else: #the opp raised from the big blind
-                            self.opp_bb_raise_count += 1
+                            self.opponent.observe_preflop(i, True, from_big_blind=True)
                             pot_odds = board_cont_cost / (pot_total + board_cont_cost)
                             opp_raise_odds_offered = board_cont_cost / pot_total
                             raw_hand_strength = self.hole_strengths[0][i]
-                            if self.opp_bb_raise_rate is not None:
-                                hand_strength = raw_hand_strength - 2 * ((self.opp_bb_raise_rate) ** 2)
-                            else:
-                                hand_strength = raw_hand_strength - 2 * ((.2) ** 2)
+                            hand_strength = raw_hand_strength - self.decision_table.bb_penalty
                             if hand_strength >= pot_odds: # at least call
                                 #TODO: Add raise all in (or 3 bet) if vey strong and opp showed aggression
-                                if raw_hand_strength > .7: # raise
-                                    raise_amount = (pot_total + board_cont_cost) * 2.5
+                                if raw_hand_strength > PREFLOP_RAISE_ABOVE: # raise
+                                    raise_amount = (pot_total + board_cont_cost) * RERAISE_POT_MULTIPLE
                                     raise_amount = max([min_raise, raise_amount])  # make sure we have a valid raise
                                     raise_amount = min([max_raise, raise_amount])
                                     my_actions[i] = RaiseAction(raise_amount)
@@ -519,22 +591,20 @@ class Player(Bot):
 
                     else: # we are big blind
                         if board_cont_cost > 0: # opponent raised
-                            self.opp_sb_raise_count += 1
+                            self.opponent.observe_preflop(i, True, from_big_blind=False)
+                            self.decision_table.update_preflop(self.opponent)
                             pot_odds = board_cont_cost / (pot_total + board_cont_cost)
                             opp_raise_odds_offered = board_cont_cost / pot_total
                             raw_hand_strength = self.hole_strengths[0][i]
-                            if self.opp_sb_raise_count is not None:
-                                hand_strength = raw_hand_strength - 2 * ((self.opp_sb_raise_count) ** 2)
-                            else:
-                                hand_strength = raw_hand_strength - 2 * ((.2) ** 2)
+                            hand_strength = raw_hand_strength - self.decision_table.sb_penalty
                             if hand_strength >= pot_odds: # at least call
                                 #TODO: Add raise all in (or 3 bet) if vey strong and opp showed aggression
-                                raise_amount = (pot_total + board_cont_cost) * 2.5
+                                raise_amount = (pot_total + board_cont_cost) * RERAISE_POT_MULTIPLE
                                 raise_amount = max([min_raise, raise_amount])  # make sure we have a valid raise
                                 raise_amount = min([max_raise, raise_amount])
 
                                 raise_cost = raise_amount - my_pips[i]
-                                if RaiseAction in legal_actions[i] and (raise_cost <= my_stack - net_cost) and raw_hand_strength > .7:
+                                if RaiseAction in legal_actions[i] and (raise_cost <= my_stack - net_cost) and raw_hand_strength > PREFLOP_RAISE_ABOVE:
                                     my_actions[i] = RaiseAction(raise_amount)
                                     net_cost += raise_cost
                                 elif CallAction in legal_actions[i]: #call
@@ -551,13 +621,13 @@ class Player(Bot):
 
 
                         else: #opponenet called
-                            self.opp_sb_call_count += 1
-                            if self.hole_strengths[0][i] > .7:
-                                raise_amount = 12
+                            self.opponent.observe_preflop(i, False, from_big_blind=False)
+                            if self.hole_strengths[0][i] > PREFLOP_RAISE_ABOVE:
+                                raise_amount = LIMP_RAISE
                                 my_actions[i] = RaiseAction(raise_amount)
                                 net_cost += raise_amount - my_pips[i]
-                            elif self.hole_strengths[0][i] > random.random():
-                                raise_amount = 12
+                            elif self.hole_strengths[0][i] > self.decision_rng.random():
+                                raise_amount = LIMP_RAISE
                                 my_actions[i] = RaiseAction(raise_amount)
                                 net_cost += raise_amount - my_pips[i]
                             else:
@@ -570,17 +640,12 @@ class Player(Bot):
 
                 #recalculate our hand strength if we have not yet for this board
                 if self.hole_strengths[street][i] is None:
-                    NUM_ITERS = 100
-                    hole_cards = self.board_allocations[i]
-                    dead_cards = list(set(my_cards) - set(hole_cards))
-                    hand_strength = self.calcualte_strength(hole_cards, NUM_ITERS, board_cards[i], dead_cards)
+                    hand_strength = self.calcualte_strength(self.hole_ids[i], NUM_ITERS, board_cards[i], self.dead_ids[i])
                     self.hole_strengths[street][i] = hand_strength
                 else:
                     hand_strength = self.hole_strengths[street][i]
 
-                raise_amount = int(pot_total * (1 + self.hole_strengths[street][i]))
-                raise_amount = max([min_raise, raise_amount]) #make sure we have a valid raise
-                raise_amount = min([max_raise, raise_amount])
+                raise_amount = min(max_raise, max(min_raise, int(pot_total * (1 + hand_strength)))) #make sure we have a valid raise
 
                 raise_cost = raise_amount - my_pips[i] #how much it costs to make that raise
 
@@ -605,34 +670,27 @@ class Player(Bot):
                     pot_odds = board_cont_cost / (pot_total + board_cont_cost)
                     opp_raise_odds_offered = board_cont_cost / pot_total
                     if street >= 3:
-                        self.opp_post_flop_raise_count += 1
                         self.opp_bets_board[i].append([opp_raise_odds_offered, board_cards[i]])
                     if street >= 3:
-                        if game_state.round_num < 30:
-                            if opp_last_action == 'Raise':
-                                _INTIMIDATION = 0.2
-                            elif opp_last_action == 'Call':
-                                _INTIMIDATION = 0.07
-                            else:
-                                _INTIMIDATION = 0
-                            previous_raise_agg_factor = (len(self.opp_bets_board[i]) - 1) * (
-                                        .5 * np.exp(-10 * self.opp_raise_rate))
-                            hand_strength = max([0, hand_strength - _INTIMIDATION - previous_raise_agg_factor])
+                        table = self.decision_table
+                        previous_raise_agg_factor = (len(self.opp_bets_board[i]) - 1) * table.aggression
+                        if game_state.round_num + self.prior_rounds < 30: #until we have seen 30 rounds of this opp, in this match or earlier ones
+                            hand_strength = max(0, hand_strength - table.strength_offset(opp_last_action, len(self.opp_bets_board[i]) - 1))
                         else:
-                            num_entries = min(55, len(self.opp_bets_strength))
-                            raise_strength_series = self.opp_bets_strength.iloc[(self.opp_bets_strength['bet'] - opp_raise_odds_offered).abs().argsort()[:num_entries]]['strength']
-                            median_raise_strength = raise_strength_series.median()
-                            avg_raise_strength = raise_strength_series.mean()
-                            previous_raise_agg_factor = (len(self.opp_bets_board[i]) - 1) * (.5 * np.exp(-10 * self.opp_raise_rate))
-                            hand_strength = 1 - ((1 - hand_strength) ** ((2+(self.opp_raise_rate - .25))*(1- (avg_raise_strength + previous_raise_agg_factor))))
+                            shown_strengths = self.opp_bets_hands.nearest(opp_raise_odds_offered, min(55, len(self.opp_bets_hands)))
+                            if len(shown_strengths) >= RANGE_MIN_HANDS: #play against the hands they bet like this with
+                                hand_strength = self.calcualte_range_strength(self.hole_ids[i], board_cards[i], self.dead_ids[i], shown_strengths)
+                            else:
+                                num_entries = min(55, len(self.opp_bets_strength))
+                                avg_raise_strength, median_raise_strength = self.opp_bets_strength.strength_stats(opp_raise_odds_offered, num_entries)
+                                hand_strength = 1 - ((1 - hand_strength) ** (table.bet_exponent * (1 - (avg_raise_strength + previous_raise_agg_factor))))
 
 
                     if hand_strength >= pot_odds: #Positive Expected Value!! at least call!!
 
-                        if hand_strength > 0.5 and random.random() < hand_strength: #raise sometimes, more likely if our hand is strong
+                        if hand_strength > 0.5 and self.decision_rng.random() < hand_strength: #raise sometimes, more likely if our hand is strong
                             my_actions[i] = commit_action
                             net_cost += commit_cost
-                            self.our_post_flop_raise_count += 1
                             continue
 
                         else: # at least call if we don't raise
@@ -647,20 +705,21 @@ class Player(Bot):
                         continue
 
                 else: #board_cont_cost == 0, we control the action
-                    if self.opp_fold_rate > 0:
-                        adj_stren = hand_strength + .5 * self.opp_fold_rate
+                    opp_fold_rate = self.opponent.opp_fold_rate
+                    if opp_fold_rate > 0:
+                        adj_stren = hand_strength + .5 * opp_fold_rate
                     else:
                         adj_stren = hand_strength
-                    if random.random() < adj_stren: #raise sometimes, more likely if our hand is strong and if oppenent overfolds
+                    if self.decision_rng.random() < adj_stren: #raise sometimes, more likely if our hand is strong and if oppenent overfolds
                         my_actions[i] = commit_action
                         net_cost += commit_cost
-                        self.our_post_flop_raise_count += 1
 
                     else: #just check otherwise
                         my_actions[i] = CheckAction()
                         net_cost += 0
 
-
+        if SPECULATE and street in (3, 4):
+            self.speculate_next_street(board_cards, round_state.board_states)
 
         return my_actions
 
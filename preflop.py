@@ -0,0 +1,103 @@
+'''
+Preflop hand strengths, and the ways to split our six cards into pairs
+(PARTITIONS) that allocation.py searches over.
+
+The strengths of the 169 canonical starting hands live in a flat float32
+file (hand_strengths.f32, 676 bytes) that is memory-mapped on first use.
+Slot 13 * i + j holds the pocket pair when i == j, the suited hand when i
+is the higher rank and the offsuit hand when j is. The file is built from
+the legacy hand_strengths.p pickle the first time it is missing.
+
+Both files can be rebuilt offline from exact heads-up equities with
+build_preflop.py.
+'''
+import os
+import pickle
+import numpy as np
+from cards import RANKS
+
+HAND_STRENGTHS_PATH = 'hand_strengths.p'
+CLASS_STRENGTHS_PATH = 'hand_strengths.f32'
+NUM_CLASSES = 169
+
+#the 15 ways to split our six cards into three pairs, as indices into the hand
+PARTITIONS = np.array([
+    [[0, 1], [2, 3], [4, 5]],
+    [[0, 1], [2, 4], [3, 5]],
+    [[0, 1], [2, 5], [3, 4]],
+
+    [[0, 2], [1, 3], [4, 5]],
+    [[0, 2], [1, 4], [3, 5]],
+    [[0, 2], [1, 5], [3, 4]],
+
+    [[0, 3], [1, 2], [4, 5]],
+    [[0, 3], [1, 4], [2, 5]],
+    [[0, 3], [1, 5], [2, 4]],
+
+    [[0, 4], [1, 2], [3, 5]],
+    [[0, 4], [1, 3], [2, 5]],
+    [[0, 4], [1, 5], [2, 3]],
+
+    [[0, 5], [1, 2], [3, 4]],
+    [[0, 5], [1, 3], [2, 4]],
+    [[0, 5], [1, 4], [2, 3]],
+])
+
+
+def _class_index_matrix():
+    ranks = np.arange(52) // 4
+    suits = np.arange(52) % 4
+    high = np.maximum(ranks[:, None], ranks[None, :])
+    low = np.minimum(ranks[:, None], ranks[None, :])
+    suited = suits[:, None] == suits[None, :]
+    return np.where(suited, 13 * high + low, 13 * low + high) #pairs are never suited, and land on 14 * rank either way
+
+
+CLASS_INDEX = _class_index_matrix() #52x52, the class slot of every pair of card ints
+
+
+def class_slot(hand_class):
+    '''
+    The slot of a hand_strengths.p key: (rank, rank) for a pocket pair,
+    otherwise (low rank, high rank, 'same' or 'diff' suit).
+    '''
+    if len(hand_class) == 2:
+        return 14 * RANKS.index(hand_class[0])
+    low, high = RANKS.index(hand_class[0]), RANKS.index(hand_class[1])
+    return 13 * high + low if hand_class[2] == 'same' else 13 * low + high
+
+
+def class_strengths_from_dict(hand_strengths):
+    '''
+    Flattens the legacy dict of dicts into the 169 slot float32 array.
+    '''
+    class_strengths = np.zeros(NUM_CLASSES, dtype='<f4')
+    for hand_class, stats in hand_strengths.items():
+        class_strengths[class_slot(hand_class)] = stats['win_prob'] + .5 * stats['draw_prob']
+    return class_strengths
+
+
+def load_class_strengths(path=CLASS_STRENGTHS_PATH, pickle_path=HAND_STRENGTHS_PATH):
+    '''
+    Memory-maps the 169 starting hand strengths, converting the legacy pickle
+    first if needed. If the converted file can't be written (say the bot's
+    directory is read only) the converted array is used from memory.
+    '''
+    if not os.path.exists(path):
+        with open(pickle_path, 'rb') as fp:
+            class_strengths = class_strengths_from_dict(pickle.load(fp))
+        try:
+            class_strengths.tofile(path)
+        except OSError:
+            return class_strengths
+    return np.memmap(path, dtype='<f4', mode='r', shape=(NUM_CLASSES,))
+
+
+def build_strength_matrix(class_strengths):
+    '''
+    Expands the 169 class strengths into a 52x52 matrix indexed by card
+    integers (see cards.py). The diagonal is unused. float32 keeps about 7
+    digits, so values are rounded to 6 decimals to put strengths like .39
+    back exactly on the cutoffs get_actions compares against.
+    '''
+    return np.round(np.asarray(class_strengths, dtype=np.float64)[CLASS_INDEX], 6)
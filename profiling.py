@@ -0,0 +1,105 @@
+'''
+Lightweight timing and counting for the bot's callbacks, so we can see where
+the game clock goes in a real match. When disabled nothing gets wrapped and
+the section/count calls return straight away.
+'''
+import contextlib
+import csv
+import json
+import time
+import numpy as np
+
+_NULL_SECTION = contextlib.nullcontext()
+
+
+class Profiler():
+    '''
+    Records the duration of instrumented callbacks and timed sections, keyed
+    by name plus optional labels (street, board), and named counters.
+    '''
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timings = {} #(name, labels...) -> list of seconds
+        self.counters = {} #(name, labels...) -> count
+
+    def instrument(self, obj, methods):
+        '''
+        Replaces methods on 'obj' with timed versions. Does nothing when disabled.
+        Arguments:
+        methods: a dict from method name to a function that takes the method's
+        arguments and returns a tuple of labels (or None for no labels)
+        '''
+        if not self.enabled:
+            return
+        for name, labels in methods.items():
+            setattr(obj, name, self._timed(name, getattr(obj, name), labels))
+
+    def _timed(self, name, method, labels):
+        def timed_method(*args, **kwargs):
+            start = time.perf_counter()
+            result = method(*args, **kwargs)
+            key = (name,) + (labels(*args, **kwargs) if labels is not None else ())
+            self.timings.setdefault(key, []).append(time.perf_counter() - start)
+            return result
+        return timed_method
+
+    def section(self, name, *labels):
+        '''
+        A context manager timing the code inside it.
+        '''
+        if not self.enabled:
+            return _NULL_SECTION
+        return self._section((name,) + labels)
+
+    @contextlib.contextmanager
+    def _section(self, key):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.setdefault(key, []).append(time.perf_counter() - start)
+
+    def count(self, name, amount=1, *labels):
+        if not self.enabled:
+            return
+        key = (name,) + labels
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def summary(self):
+        '''
+        Returns:
+        a list of rows, one per timed key, with count, total and latency percentiles in ms
+        '''
+        rows = []
+        for key, seconds in sorted(self.timings.items(), key=lambda item: str(item[0])):
+            millis = np.array(seconds) * 1000
+            rows.append({
+                'name': key[0],
+                'labels': '/'.join(str(label) for label in key[1:]),
+                'count': len(millis),
+                'total_ms': float(millis.sum()),
+                'mean_ms': float(millis.mean()),
+                'p50_ms': float(np.percentile(millis, 50)),
+                'p99_ms': float(np.percentile(millis, 99)),
+                'max_ms': float(millis.max()),
+            })
+        return rows
+
+    def dump(self, path_prefix, extra_counters=None):
+        '''
+        Writes the summary to '<path_prefix>.json' and '<path_prefix>.csv'.
+        Arguments:
+        extra_counters: counters kept elsewhere (e.g. cache stats) to include in the json
+        '''
+        if not self.enabled:
+            return
+        rows = self.summary()
+        counters = {'/'.join(str(part) for part in key): value for key, value in self.counters.items()}
+        counters.update(extra_counters or {})
+        with open(path_prefix + '.json', 'w') as fp:
+            json.dump({'timings': rows, 'counters': counters}, fp, indent=1)
+        with open(path_prefix + '.csv', 'w', newline='') as fp:
+            writer = csv.DictWriter(fp, fieldnames=list(rows[0].keys()) if rows else ['name'])
+            writer.writeheader()
+            writer.writerows(rows)
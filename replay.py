@@ -0,0 +1,89 @@
+'''
+Re-drives a Player through a match recorded with DECISION_LOG_PATH: the same
+seed and the same callback inputs, so slow or bad decisions can be looked at
+again and changes can be timed against identical situations.
+
+    python replay.py decisions.dlog --slowest 10
+
+Decisions only come out identical if the original match was played with
+DETERMINISTIC on; otherwise how much was sampled depended on the clock.
+'''
+import argparse
+import contextlib
+import io
+import time
+import numpy as np
+import player
+from decision_log import read_log, NEW_ROUND, ACTIONS
+from skeleton.actions import RaiseAction
+
+
+def _same_actions(logged, replayed):
+    '''
+    Compares two action lists the way the log stores them (raise amounts as ints).
+    '''
+    if len(logged) != len(replayed):
+        return False
+    for a, b in zip(logged, replayed):
+        if type(a) != type(b):
+            return False
+        if isinstance(a, RaiseAction) and int(a.amount) != int(b.amount):
+            return False
+    return True
+
+
+def replay(path, deterministic=True, idle=0.):
+    '''
+    Plays the logged callbacks into a fresh Player seeded like the original.
+    Arguments:
+    idle: seconds to wait before each callback, standing in for the time a
+    real match spends waiting on the engine and the opponent
+    Returns:
+    one dict per get_actions call with its round, street, logged and replayed
+    seconds and whether the replayed actions matched the logged ones
+    '''
+    seed, records = read_log(path)
+    player.SEED = seed
+    player.DETERMINISTIC = deterministic
+    player.DECISION_LOG_PATH = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = player.Player()
+    decisions = []
+    for record in records:
+        game_state, active = record['game_state'], record['active']
+        if idle > 0:
+            time.sleep(idle)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if record['kind'] == NEW_ROUND:
+                bot.handle_new_round(game_state, record['round_state'], active)
+            elif record['kind'] == ACTIONS:
+                start = time.perf_counter()
+                actions = bot.get_actions(game_state, record['round_state'], active)
+                seconds = time.perf_counter() - start
+                decisions.append({
+                    'round_num': game_state.round_num,
+                    'street': record['round_state'].street,
+                    'logged_seconds': record['seconds'],
+                    'seconds': seconds,
+                    'matches': _same_actions(record['actions'], actions),
+                })
+            else:
+                bot.handle_round_over(game_state, record['terminal_state'], active)
+    return decisions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay a decision log through Player.')
+    parser.add_argument('log')
+    parser.add_argument('--slowest', type=int, default=10, help='how many of the slowest decisions to list')
+    parser.add_argument('--clocked', action='store_true', help='keep the clock based sampling cutoffs')
+    args = parser.parse_args()
+    decisions = replay(args.log, deterministic=not args.clocked)
+    logged = np.array([decision['logged_seconds'] for decision in decisions])
+    replayed = np.array([decision['seconds'] for decision in decisions])
+    print('decisions:', len(decisions))
+    print('mismatched decisions:', sum(not decision['matches'] for decision in decisions))
+    print('total seconds logged: %.3f replayed: %.3f' % (logged.sum(), replayed.sum()))
+    print('p99 ms logged: %.2f replayed: %.2f' % (np.percentile(logged, 99) * 1000, np.percentile(replayed, 99) * 1000))
+    for decision in sorted(decisions, key=lambda decision: -decision['seconds'])[:args.slowest]:
+        print('round %(round_num)d street %(street)d: %(seconds).4fs (logged %(logged_seconds).4fs)' % decision, '' if decision['matches'] else 'MISMATCH')
@@ -0,0 +1,97 @@
+'''
+Splits the game clock between rounds and equity decisions.
+'''
+import time
+
+CLOCK_RESERVE = 2. #seconds we never plan to spend, in case the engine's clock and ours drift
+EQUITY_SHARE = .8 #fraction of a round's budget we let equity estimation use
+DECISIONS_PER_ROUND = 5 #the allocation search, flop, turn and river equity plus the work done at round over
+
+
+class TimeBudget():
+    '''
+    Allocates a sampling budget per decision from the remaining game clock and
+    the number of rounds left, and records how much of it each round used.
+    '''
+
+    def __init__(self, num_rounds, deterministic=False):
+        self.num_rounds = num_rounds
+        self.deterministic = deterministic #give every decision unlimited time, so estimators stop on accuracy alone
+        self.round_budget = 0
+        self.round_spent = 0
+        self.round_samples = 0
+        self.round_decisions = 0
+        self.round_start_clock = None
+        self.round_num = 0
+        self.last_samples = 0
+        self.round_stats = [] #one dict per finished round
+
+    def start_round(self, game_clock, round_num):
+        '''
+        Called at the start of every round with the clock the engine reports.
+        '''
+        rounds_left = self.num_rounds - round_num + 1
+        self.round_budget = max(0., game_clock - CLOCK_RESERVE) / max(1, rounds_left)
+        self.round_spent = 0
+        self.round_samples = 0
+        self.round_decisions = 0
+        self.round_start_clock = game_clock
+        self.round_num = round_num
+
+    def decision_budget(self):
+        '''
+        Returns how many seconds the next equity decision may take: what is
+        left of this round's equity share, split over the decisions we still
+        expect to make this round.
+        '''
+        if self.deterministic:
+            return float('inf')
+        remaining = EQUITY_SHARE * self.round_budget - self.round_spent
+        decisions_left = max(1, DECISIONS_PER_ROUND - self.round_decisions)
+        return max(0., remaining / decisions_left)
+
+    def record(self, seconds, samples):
+        '''
+        Records one equity decision.
+        '''
+        self.round_spent += seconds
+        self.round_samples += samples
+        self.last_samples = samples
+        self.round_decisions += 1
+
+    def timed(self, estimator, *args, **kwargs):
+        '''
+        Runs an anytime estimator with the current decision budget and records
+        its cost. The estimator is called as estimator(*args, budget, **kwargs)
+        and must return (result, samples).
+        '''
+        start = time.perf_counter()
+        result, samples = estimator(*args, self.decision_budget(), **kwargs)
+        self.record(time.perf_counter() - start, samples)
+        return result
+
+    def end_round(self, game_clock):
+        '''
+        Called at the end of every round, stores the round's spend stats.
+        '''
+        self.round_stats.append({
+            'round': self.round_num,
+            'budget': self.round_budget,
+            'equity_seconds': self.round_spent,
+            'clock_seconds': self.round_start_clock - game_clock,
+            'samples': self.round_samples,
+            'decisions': self.round_decisions,
+        })
+
+    def summary(self):
+        '''
+        Totals of the per-round stats, for printing at the end of a game.
+        '''
+        rounds = max(1, len(self.round_stats))
+        return {
+            'rounds': len(self.round_stats),
+            'equity_seconds': sum(stat['equity_seconds'] for stat in self.round_stats),
+            'clock_seconds': sum(stat['clock_seconds'] for stat in self.round_stats),
+            'samples': sum(stat['samples'] for stat in self.round_stats),
+            'avg_samples_per_round': sum(stat['samples'] for stat in self.round_stats) / rounds,
+        }
@@ -0,0 +1,314 @@
+'''
+A local, in-process version of the three board engine, so bots can play
+each other without the socket runner. Bots see the same skeleton GameState,
+RoundState, BoardState and TerminalState objects the real runner hands them;
+the authoritative state is kept here and a per-player view (with the
+opponent's cards hidden) is built for every callback. A match can also write
+a game log in the engine's text format (see game_log.py for the lines).
+
+Rules follow the competition engine: every round each player gets six cards
+and assigns two of them to each board, blinds are posted on every board out
+of one shared stack, the boards are bet independently but move through the
+streets together, and the round ends once every board is folded or shown down.
+'''
+import random
+import time
+import eval7
+from skeleton.actions import FoldAction, CallAction, CheckAction, RaiseAction, AssignAction
+from skeleton.states import GameState, TerminalState, RoundState, BoardState
+from skeleton.states import NUM_ROUNDS, STARTING_STACK, BIG_BLIND, SMALL_BLIND, NUM_BOARDS
+
+STARTING_GAME_CLOCK = 30. #seconds each bot gets for the whole match
+STREETS = [0, 3, 4, 5]
+STREET_NAMES = {3: 'Flop', 4: 'Turn', 5: 'River'}
+BOT_NAMES = ('A', 'B')
+
+
+def format_cards(cards):
+    return '[' + ' '.join(cards) + ']'
+
+
+class SimBoard():
+    '''
+    The engine's state for one board within a round.
+    '''
+
+    def __init__(self, runout):
+        self.runout = runout #the five board cards, revealed as the streets go
+        self.hands = [[], []]
+        self.pips = [SMALL_BLIND, BIG_BLIND] #chips put in on the current street
+        self.contributions = [SMALL_BLIND, BIG_BLIND] #chips put in over the whole round
+        self.settled = False
+        self.street_actions = 0 #betting actions taken on the current street
+        self.folded = None #index of the player who folded this board
+        self.deltas = None #set once the board is over
+
+    def revealed(self, street):
+        return self.runout[:street] + [''] * (5 - street)
+
+    def legal_actions(self, active, stacks):
+        if self.deltas is not None:
+            return {CheckAction}
+        if self.hands[active] == []:
+            return {AssignAction}
+        if self.settled:
+            return {CheckAction}
+        continue_cost = self.pips[1-active] - self.pips[active]
+        if continue_cost == 0:
+            bets_forbidden = (stacks[0] == 0 or stacks[1] == 0)
+            return {CheckAction} if bets_forbidden else {CheckAction, RaiseAction}
+        raises_forbidden = (continue_cost >= stacks[active] or stacks[1-active] == 0)
+        return {FoldAction, CallAction} if raises_forbidden else {FoldAction, CallAction, RaiseAction}
+
+    def raise_bounds(self, active, stacks):
+        continue_cost = self.pips[1-active] - self.pips[active]
+        max_contribution = min(stacks[active], stacks[1-active] + continue_cost)
+        min_contribution = min(max_contribution, continue_cost + max(continue_cost, BIG_BLIND))
+        return (self.pips[active] + min_contribution, self.pips[active] + max_contribution)
+
+    def pay(self, player, amount, stacks):
+        self.pips[player] += amount
+        self.contributions[player] += amount
+        stacks[player] -= amount
+
+    def finish(self, street):
+        '''
+        Settles the board's pot, either to the player who didn't fold or at
+        showdown. Chips a player put in that were never matched go back to them.
+        '''
+        matched = min(self.contributions)
+        if self.folded is not None:
+            winner_share = [0, 0]
+            winner_share[1 - self.folded] = 2 * matched
+        else:
+            board = [eval7.Card(card) for card in self.runout]
+            score0 = eval7.evaluate(board + [eval7.Card(card) for card in self.hands[0]])
+            score1 = eval7.evaluate(board + [eval7.Card(card) for card in self.hands[1]])
+            if score0 > score1:
+                winner_share = [2 * matched, 0]
+            elif score0 < score1:
+                winner_share = [0, 2 * matched]
+            else:
+                winner_share = [matched, matched]
+        self.deltas = [winner_share[i] + (self.contributions[i] - matched) - self.contributions[i] for i in range(2)]
+
+
+class SimRound():
+    '''
+    The engine's state for one round: six cards each, three boards and one
+    shared stack per player.
+    '''
+
+    def __init__(self, deck, names=None):
+        '''
+        Arguments:
+        names: the names of the small and big blind, to keep a game log
+        under, or None for no log
+        '''
+        self.names = names
+        self.log = [] if names is not None else None
+        self.hands = [deck[:6], deck[6:12]]
+        self.boards = [SimBoard(deck[12 + 5 * i: 17 + 5 * i]) for i in range(NUM_BOARDS)]
+        self.stacks = [STARTING_STACK - NUM_BOARDS * SMALL_BLIND, STARTING_STACK - NUM_BOARDS * BIG_BLIND]
+        self.street = 0
+        self.button = 0
+
+    def active(self):
+        return self.button % 2
+
+    def is_over(self):
+        return all(board.deltas is not None for board in self.boards)
+
+    def legal_actions(self):
+        return [board.legal_actions(self.active(), self.stacks) for board in self.boards]
+
+    def view(self, player, reveal=False):
+        '''
+        Builds the skeleton RoundState the given player sees. The opponent's
+        cards are hidden unless 'reveal' is set, in which case the ones on boards
+        that went to showdown are shown.
+        '''
+        board_states = []
+        for board in self.boards:
+            hands = [[], []]
+            hands[player] = list(board.hands[player])
+            if reveal and board.folded is None:
+                hands[1-player] = list(board.hands[1-player])
+            pot = sum(board.contributions) - sum(board.pips)
+            board_state = BoardState(pot=pot, pips=list(board.pips), hands=hands, deck=board.revealed(self.street),
+                                     previous_state=None, settled=board.settled)
+            if board.deltas is not None:
+                board_state = TerminalState(list(board.deltas), board_state)
+            board_states.append(board_state)
+        hands = [[], []]
+        hands[player] = list(self.hands[player])
+        return RoundState(button=self.button, street=self.street, stacks=list(self.stacks), hands=hands,
+                          board_states=board_states, previous_state=None)
+
+    def apply(self, actions):
+        '''
+        Applies the active player's triplet of actions. Illegal or unaffordable
+        actions are replaced the way the engine does it: check if possible,
+        otherwise fold.
+        '''
+        active = self.active()
+        legal = self.legal_actions()
+        for i, board in enumerate(self.boards):
+            action = actions[i] if actions is not None and i < len(actions) else None
+            if type(action) not in legal[i]:
+                action = CheckAction() if CheckAction in legal[i] else AssignAction(None) if AssignAction in legal[i] else FoldAction()
+            live = board.deltas is None and not board.settled #checks on finished or settled boards aren't logged
+            if isinstance(action, AssignAction):
+                self.assign(board, active, action.cards)
+                self.write_log('%s assigns %s to board %d', active, format_cards(board.hands[active]), i + 1)
+            elif isinstance(action, FoldAction):
+                board.folded = active
+                board.finish(self.street)
+                self.write_log('%s folds on board %d', active, i + 1)
+                self.log_result(i)
+            elif isinstance(action, CallAction):
+                board.pay(active, min(board.pips[1-active] - board.pips[active], self.stacks[active]), self.stacks)
+                board.settled = not (self.street == 0 and board.street_actions == 0) #the big blind still gets their option
+                board.street_actions += 1
+                self.write_log('%s calls on board %d', active, i + 1)
+            elif isinstance(action, CheckAction):
+                if board.deltas is None and board.street_actions > 0:
+                    board.settled = True
+                board.street_actions += 1
+                if live:
+                    self.write_log('%s checks on board %d', active, i + 1)
+            else:
+                min_raise, max_raise = board.raise_bounds(active, self.stacks)
+                amount = int(action.amount) #the runner sends raises as whole chips
+                amount = amount if min_raise <= amount <= max_raise else min_raise
+                verb = 'bets %d' if board.pips[active] == board.pips[1-active] else 'raises to %d'
+                board.pay(active, amount - board.pips[active], self.stacks)
+                board.street_actions += 1
+                self.write_log('%s ' + verb + ' on board %d', active, amount, i + 1)
+        self.button += 1
+        if all(board.deltas is not None or (board.settled and [] not in board.hands) for board in self.boards):
+            self.proceed_street()
+
+    def assign(self, board, player, cards):
+        used = [card for other in self.boards for card in other.hands[player]]
+        unused = [card for card in self.hands[player] if card not in used]
+        if cards is None or len(set(cards)) != 2 or any(card not in unused for card in cards):
+            cards = unused[:2]
+        board.hands[player] = list(cards)
+
+    def proceed_street(self):
+        if self.street == 5 or self.is_over():
+            for i, board in enumerate(self.boards):
+                if board.deltas is None:
+                    board.finish(self.street)
+                    for player in range(2):
+                        self.write_log('%s shows %s on board %d', player, format_cards(board.hands[player]), i + 1)
+                    self.log_result(i)
+            return
+        self.street = STREETS[STREETS.index(self.street) + 1]
+        self.button = 1 #the big blind acts first after the flop
+        for i, board in enumerate(self.boards):
+            board.pips = [0, 0]
+            board.settled = False
+            board.street_actions = 0
+            if board.deltas is None and self.log is not None:
+                self.log.append('%s %s on board %d' % (STREET_NAMES[self.street], format_cards(board.runout[:self.street]), i + 1))
+
+    def write_log(self, line, player, *args):
+        '''
+        Adds a line about 'player' (0 or 1) to the game log, if we keep one.
+        '''
+        if self.log is not None:
+            self.log.append(line % ((self.names[player],) + args))
+
+    def log_result(self, i):
+        for player in range(2):
+            if self.boards[i].deltas[player] > 0:
+                self.write_log('%s awarded %d on board %d', player, self.boards[i].deltas[player], i + 1)
+
+
+class Match():
+    '''
+    Plays a full match between two bots and records how they spend their clock.
+    '''
+
+    def __init__(self, bots, num_rounds=NUM_ROUNDS, game_clock=STARTING_GAME_CLOCK, seed=None, game_log_path=None):
+        '''
+        Arguments:
+        game_log_path: where to write the engine style game log, None for no log
+        '''
+        self.bots = bots
+        self.game_log_path = game_log_path
+        self.game_log = [] if game_log_path is not None else None
+        self.num_rounds = num_rounds
+        self.starting_clock = game_clock
+        self.game_clocks = [game_clock, game_clock]
+        self.bankrolls = [0, 0]
+        self.latencies = [[], []] #seconds taken by each get_actions call
+        self.rng = random.Random(seed)
+        self.deck = [rank + suit for rank in '23456789TJQKA' for suit in 'cdhs']
+
+    def call(self, bot_index, method, *args):
+        '''
+        Runs a bot callback and charges the time it takes to that bot's clock.
+        Returns None instead if the bot has already run out of time.
+        '''
+        if self.game_clocks[bot_index] <= 0:
+            return None
+        start = time.perf_counter()
+        result = getattr(self.bots[bot_index], method)(*args)
+        elapsed = time.perf_counter() - start
+        self.game_clocks[bot_index] -= elapsed
+        if method == 'get_actions':
+            self.latencies[bot_index].append(elapsed)
+        return result
+
+    def game_state(self, bot_index, round_num):
+        return GameState(self.bankrolls[bot_index], self.bankrolls[1-bot_index], self.game_clocks[bot_index], round_num)
+
+    def play_round(self, round_num):
+        seats = [0, 1] if round_num % 2 == 1 else [1, 0] #seats[player] is the bot sitting there, blinds alternate
+        self.rng.shuffle(self.deck)
+        if self.game_log is not None:
+            self.game_log.append('Round #%d, %s (%d), %s (%d)' % (round_num, BOT_NAMES[0], self.bankrolls[0], BOT_NAMES[1], self.bankrolls[1]))
+        round_ = SimRound(self.deck, [BOT_NAMES[seats[0]], BOT_NAMES[seats[1]]] if self.game_log is not None else None)
+        if self.game_log is not None:
+            for player in range(2):
+                for i in range(NUM_BOARDS):
+                    self.game_log.append('%s posts the blind of %d on board %d' % (BOT_NAMES[seats[player]], BIG_BLIND if player else SMALL_BLIND, i + 1))
+            for player in range(2):
+                self.game_log.append('%s dealt %s' % (BOT_NAMES[seats[player]], format_cards(round_.hands[player])))
+        for player in range(2):
+            self.call(seats[player], 'handle_new_round', self.game_state(seats[player], round_num), round_.view(player), player)
+        while not round_.is_over():
+            player = round_.active()
+            actions = self.call(seats[player], 'get_actions', self.game_state(seats[player], round_num), round_.view(player), player)
+            round_.apply(actions)
+        deltas = [sum(board.deltas[player] for board in round_.boards) for player in range(2)]
+        if self.game_log is not None:
+            self.game_log.extend(round_.log)
+            for player in range(2):
+                self.game_log.append('%s awarded %d' % (BOT_NAMES[seats[player]], deltas[player]))
+        for player in range(2):
+            self.bankrolls[seats[player]] += deltas[player]
+        for player in range(2):
+            terminal_state = TerminalState(list(deltas), round_.view(player, reveal=True))
+            self.call(seats[player], 'handle_round_over', self.game_state(seats[player], round_num), terminal_state, player)
+
+    def play(self):
+        '''
+        Returns:
+        a dict with both bots' final bankrolls, get_actions latencies and clock used
+        '''
+        for round_num in range(1, self.num_rounds + 1):
+            self.play_round(round_num)
+        if self.game_log is not None:
+            self.game_log.append('Final, %s (%d), %s (%d)' % (BOT_NAMES[0], self.bankrolls[0], BOT_NAMES[1], self.bankrolls[1]))
+            with open(self.game_log_path, 'w') as fp:
+                fp.write('\n'.join(self.game_log) + '\n')
+        return {
+            'bankrolls': list(self.bankrolls),
+            'latencies': self.latencies,
+            'clock_used': [self.starting_clock - clock for clock in self.game_clocks],
+            'rounds': self.num_rounds,
+        }
@@ -0,0 +1,44 @@
+'''
+Checks that the suit canonicalization behind the equity cache and table keys
+gives every suit relabeling of a situation the same representative.
+'''
+import random
+from cards import SUIT_PERMUTATIONS, canonical_cards, canonical_situation, pack_cards
+
+NUM_SITUATIONS = 500
+SEED = 0
+
+
+def relabel(cards, permutation):
+    return [card - card % 4 + permutation[card % 4] for card in cards]
+
+
+def random_situations(rng):
+    for _ in range(NUM_SITUATIONS):
+        cards = rng.sample(range(52), 2 + 5 + 4)
+        yield cards[:2], cards[2: 2 + rng.choice((0, 3, 4, 5))], cards[7:]
+
+
+def test_suit_relabelings_share_a_key():
+    rng = random.Random(SEED)
+    for hole, board, dead in random_situations(rng):
+        hole_key, board_key = canonical_cards(hole, board)
+        key = pack_cards(hole_key + board_key)
+        situation = canonical_situation(hole, board, dead)
+        for permutation in SUIT_PERMUTATIONS:
+            canon_hole, canon_board = canonical_cards(relabel(hole, permutation), relabel(board, permutation))
+            assert pack_cards(canon_hole + canon_board) == key
+            assert canonical_situation(relabel(hole, permutation), relabel(board, permutation), relabel(dead, permutation)) == situation
+
+
+def test_representative_is_a_relabeling():
+    rng = random.Random(SEED + 1)
+    for hole, board, dead in random_situations(rng):
+        canon_hole, canon_board = canonical_cards(hole, board)
+        assert any(sorted(relabel(hole, permutation)) == list(canon_hole) and sorted(relabel(board, permutation)) == list(canon_board)
+                   for permutation in SUIT_PERMUTATIONS)
+
+
+def test_different_ranks_differ():
+    assert canonical_cards([48, 49], [0, 4, 8]) != canonical_cards([48, 49], [0, 4, 12]) #AA on 234 vs 235
+    assert canonical_cards([48, 44], [0, 4, 8]) != canonical_cards([48, 45], [0, 4, 8]) #AKs vs AKo
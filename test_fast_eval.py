@@ -0,0 +1,59 @@
+'''
+Checks the vectorized evaluator against eval7: every pair of hands must be
+ordered the same way (which is all either evaluator promises).
+'''
+import eval7
+import numpy as np
+import fast_eval
+from cards import card_to_int, int_to_card
+
+NUM_HANDS = 20000
+SEED = 0
+
+#hands random deals hardly ever reach, weakest first
+SPECIAL_HANDS = [
+    '2c 3d 4h 5s 7c 8d 9h', #seven high
+    'As 2d 3c 4h 5s 9c Td', #the wheel
+    '9c Td Jh Qs Kc 2d 3h', #king high straight
+    'Tc Jd Qh Ks Ac 2d 3h', #broadway
+    '2h 7h 9h Jh Kh Ac Ad', #flush over a pair
+    '2c 2d 2h 3c 3d 3h 9s', #two sets, threes full of twos
+    'Ac Ad Ah As 2c 3d 4h', #quads
+    'Ac 2c 3c 4c 5c Kd Kh', #steel wheel
+    'Ts Js Qs Ks As 2d 2h', #royal flush
+]
+
+
+def eval7_values(hands):
+    return np.array([eval7.evaluate([eval7.Card(int_to_card(card)) for card in hand]) for hand in hands])
+
+
+def assert_same_order(ours, theirs):
+    order = np.argsort(theirs, kind='stable')
+    assert (np.sign(np.diff(ours[order])) == np.sign(np.diff(theirs[order]))).all()
+
+
+def random_hands(rng, count):
+    return np.argsort(rng.random((count, 52)), axis=1)[:, :7].astype(np.int32)
+
+
+def test_random_hands_order_like_eval7():
+    hands = random_hands(np.random.default_rng(SEED), NUM_HANDS)
+    assert_same_order(fast_eval.evaluate(hands), eval7_values(hands))
+
+
+def test_special_hands_order_like_eval7():
+    hands = np.array([[card_to_int(card) for card in hand.split()] for hand in SPECIAL_HANDS], dtype=np.int32)
+    ours = fast_eval.evaluate(hands)
+    assert_same_order(ours, eval7_values(hands))
+    assert (np.diff(ours) > 0).all()
+
+
+def test_partial_hand_matches_full_hand():
+    rng = np.random.default_rng(SEED + 1)
+    deck = rng.permutation(52).astype(np.int32)
+    board, rest = deck[:5], deck[5:]
+    holes = rest[np.array([(i, j) for i in range(len(rest)) for j in range(i + 1, len(rest))])]
+    full = fast_eval.evaluate(np.concatenate([holes, np.tile(board, (len(holes), 1))], axis=1))
+    partial = fast_eval.evaluate(holes, fast_eval.add_cards(fast_eval.EMPTY_HAND, board))
+    assert (full == partial).all()
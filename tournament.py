@@ -0,0 +1,148 @@
+'''
+Offline self-play tournament: plays many simulator matches of Player against
+a baseline bot across all cores and reports chips won per round, get_actions
+latency percentiles and game clock usage.
+
+    python tournament.py --matches 64 --opponent checkcall
+'''
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import numpy as np
+from skeleton.actions import CallAction, CheckAction, RaiseAction, AssignAction
+from skeleton.bot import Bot
+from skeleton.states import NUM_ROUNDS, NUM_BOARDS
+from simulator import Match, STARTING_GAME_CLOCK
+
+
+class CheckCallBot(Bot):
+    '''
+    Assigns its cards in the order dealt and checks or calls every street.
+    '''
+
+    def handle_new_round(self, game_state, round_state, active):
+        self.my_cards = round_state.hands[active]
+
+    def handle_round_over(self, game_state, terminal_state, active):
+        pass
+
+    def get_actions(self, game_state, round_state, active):
+        legal_actions = round_state.legal_actions()
+        my_actions = []
+        for i in range(NUM_BOARDS):
+            if AssignAction in legal_actions[i]:
+                my_actions.append(AssignAction(self.my_cards[2 * i: 2 * i + 2]))
+            elif CheckAction in legal_actions[i]:
+                my_actions.append(CheckAction())
+            else:
+                my_actions.append(CallAction())
+        return my_actions
+
+
+class RandomBot(CheckCallBot):
+    '''
+    Assigns its cards in the order dealt and then picks a random legal action
+    on every board, raising by the minimum.
+    '''
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def get_actions(self, game_state, round_state, active):
+        legal_actions = round_state.legal_actions()
+        my_actions = []
+        for i in range(NUM_BOARDS):
+            if AssignAction in legal_actions[i]:
+                my_actions.append(AssignAction(self.my_cards[2 * i: 2 * i + 2]))
+                continue
+            action = self.rng.choice(sorted(legal_actions[i], key=lambda action: action.__name__))
+            if action is RaiseAction:
+                min_raise, max_raise = round_state.board_states[i].raise_bounds(active, round_state.stacks)
+                my_actions.append(RaiseAction(min_raise))
+            else:
+                my_actions.append(action())
+        return my_actions
+
+
+def make_bot(name, seed):
+    if name == 'checkcall':
+        return CheckCallBot()
+    if name == 'random':
+        return RandomBot(seed)
+    if name == 'player':
+        import player
+        player.SEED = seed
+        return player.Player()
+    raise ValueError('unknown bot: ' + name)
+
+
+def play_match(args):
+    '''
+    Plays one match of 'hero' against 'opponent' (bot names) in this process.
+    The bots' prints are swallowed so a tournament's output stays readable.
+    '''
+    hero, opponent, num_rounds, game_clock, seed, game_log_dir = args
+    game_log_path = os.path.join(game_log_dir, 'match_%d.txt' % seed) if game_log_dir is not None else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        bots = [make_bot(hero, seed), make_bot(opponent, seed + 1)]
+        result = Match(bots, num_rounds, game_clock, seed, game_log_path).play()
+    return {
+        'chips': result['bankrolls'][0],
+        'rounds': result['rounds'],
+        'latencies': np.array(result['latencies'][0], dtype=np.float32),
+        'clock_used': result['clock_used'][0],
+    }
+
+
+def summarize(results):
+    '''
+    Aggregates match results into the numbers we care about.
+    '''
+    chips_per_round = np.array([result['chips'] / result['rounds'] for result in results])
+    latencies = np.concatenate([result['latencies'] for result in results]) * 1000
+    clock_used = np.array([result['clock_used'] for result in results])
+    return {
+        'matches': len(results),
+        'chips_per_round': float(chips_per_round.mean()),
+        'chips_per_round_stderr': float(chips_per_round.std() / np.sqrt(len(results))),
+        'win_rate': float((chips_per_round > 0).mean()),
+        'decisions': len(latencies),
+        'latency_ms_p50': float(np.percentile(latencies, 50)),
+        'latency_ms_p90': float(np.percentile(latencies, 90)),
+        'latency_ms_p99': float(np.percentile(latencies, 99)),
+        'latency_ms_max': float(latencies.max()),
+        'clock_used_mean': float(clock_used.mean()),
+        'clock_used_max': float(clock_used.max()),
+    }
+
+
+def run_tournament(matches, hero='player', opponent='checkcall', num_rounds=NUM_ROUNDS, game_clock=STARTING_GAME_CLOCK, workers=None, seed=0, game_log_dir=None):
+    '''
+    Arguments:
+    game_log_dir: a directory to write every match's game log to (the hero is A), None for no logs
+    '''
+    if game_log_dir is not None:
+        os.makedirs(game_log_dir, exist_ok=True)
+    tasks = [(hero, opponent, num_rounds, game_clock, seed + 2 * i, game_log_dir) for i in range(matches)]
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.map(play_match, tasks, chunksize=1)
+    return summarize(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play Player against a baseline bot in the local simulator.')
+    parser.add_argument('--matches', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--hero', default='player', choices=['player', 'checkcall', 'random'])
+    parser.add_argument('--opponent', default='checkcall', choices=['player', 'checkcall', 'random'])
+    parser.add_argument('--rounds', type=int, default=NUM_ROUNDS)
+    parser.add_argument('--game-clock', type=float, default=STARTING_GAME_CLOCK)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--game-logs', default=None, help='write engine style game logs here, for counterfactual.py')
+    args = parser.parse_args()
+    summary = run_tournament(args.matches, args.hero, args.opponent, args.rounds, args.game_clock, args.workers, args.seed, args.game_logs)
+    for key, value in summary.items():
+        print(key, ':', value)
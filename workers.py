@@ -0,0 +1,89 @@
+'''
+Background execution for work that doesn't need to finish before we answer
+the engine.
+'''
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class BackgroundQueue():
+    '''
+    Runs jobs on a background thread so a callback can queue them and return
+    straight away. The bot spends most of a match waiting on the engine, which
+    is when these jobs get to run. Results are handed back by drain() once the
+    jobs are done.
+    '''
+
+    def __init__(self, workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='background')
+        self.futures = []
+
+    def __len__(self):
+        return len(self.futures)
+
+    def submit(self, job, *args):
+        self.futures.append(self.executor.submit(job, *args))
+
+    def drain(self, block=False):
+        '''
+        Returns the results of the jobs that have finished, in the order they
+        were queued, and forgets about them.
+        Arguments:
+        block: wait for every queued job to finish first
+        '''
+        if block:
+            wait(self.futures)
+        done = [future for future in self.futures if future.done()]
+        self.futures = [future for future in self.futures if not future.done()]
+        return [future.result() for future in done]
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.futures = []
+
+
+class Speculator():
+    '''
+    Works through a list of jobs on a background thread whose results are
+    only worth having if they are ready in time, like equities for cards that
+    may come next. The jobs store their results themselves (in a cache), and
+    stop() makes the running list give up after the job it is on, so a
+    speculative run never holds up the callback that replaces it by more than
+    one job.
+    '''
+
+    def __init__(self):
+        self.queue = BackgroundQueue()
+        self.stop_event = threading.Event()
+
+    def start(self, job, arg_lists):
+        '''
+        Stops the current run and starts calling job(*args) for each of 'arg_lists' in order.
+        '''
+        self.stop()
+        self.stop_event = threading.Event()
+        self.queue.submit(self._run, job, arg_lists, self.stop_event)
+
+    @staticmethod
+    def _run(job, arg_lists, stop_event):
+        done = 0
+        for args in arg_lists:
+            if stop_event.is_set():
+                break
+            job(*args)
+            done += 1
+        return done
+
+    def stop(self):
+        self.stop_event.set()
+
+    def drain(self):
+        '''
+        Returns how many jobs each finished run got through.
+        '''
+        return self.queue.drain()
+
+    def close(self):
+        self.stop()
+        self.queue.close()
+